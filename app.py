@@ -1,13 +1,26 @@
-from flask import Flask, jsonify
-from flask_migrate import Migrate
-# from flask_socketio import SocketIO
-from flask_jwt_extended import JWTManager
+import logging
+import multiprocessing
+import os
 from datetime import timedelta
-from models import db,TokenBlocklist
+
+from dotenv import load_dotenv
+from flask import Flask, jsonify
 from flask_cors import CORS
+from flask_jwt_extended import JWTManager
 from flask_mail import Mail
-import os
-from dotenv import load_dotenv
+from flask_migrate import Migrate
+# from flask_socketio import SocketIO
+from sqlalchemy.exc import SQLAlchemyError
+
+import commands
+from blocklist import revoked_tokens
+from featured_tasks import featured_tasks
+from hashing import password_hasher
+from identity import user_profiles
+from models import db, Task, TaskAssignment, TaskCounter, TaskList, User
+from response_cache import response_cache
+from scheduler import Scheduler
+from tasklist_templates import template_catalog
 
 load_dotenv()
 
@@ -33,17 +46,55 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "your-secret-key")
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "your-default-secret")
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=7)
+app.config["BLOCKLIST_POLL_INTERVAL"] = int(os.getenv("BLOCKLIST_POLL_INTERVAL", 5))
+app.config["BLOCKLIST_BLOOM_CAPACITY"] = int(os.getenv("BLOCKLIST_BLOOM_CAPACITY", 10000))
+app.config["BLOCKLIST_BLOOM_ERROR_RATE"] = float(os.getenv("BLOCKLIST_BLOOM_ERROR_RATE", 0.01))
+app.config["BLOCKLIST_PRUNE_INTERVAL"] = int(os.getenv("BLOCKLIST_PRUNE_INTERVAL", 3600))
+app.config["BLOCKLIST_PRUNE_BATCH_SIZE"] = int(os.getenv("BLOCKLIST_PRUNE_BATCH_SIZE", 1000))
+app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+app.config["HASH_POOL_WORKERS"] = int(os.getenv("HASH_POOL_WORKERS", os.cpu_count() or 1))
+app.config["HASH_POOL_MAX_PENDING"] = int(os.getenv("HASH_POOL_MAX_PENDING", 4 * app.config["HASH_POOL_WORKERS"] or 1))
+app.config["HASH_POOL_TIMEOUT"] = float(os.getenv("HASH_POOL_TIMEOUT", 10))
+app.config["HASH_POOL_RETRY_AFTER"] = int(os.getenv("HASH_POOL_RETRY_AFTER", 1))
+app.config["USER_CACHE_TTL"] = int(os.getenv("USER_CACHE_TTL", 30))
+app.config["TASKS_MAX_PAGE_SIZE"] = int(os.getenv("TASKS_MAX_PAGE_SIZE", 100))
+app.config["TASKLIST_TASKS_LIMIT"] = int(os.getenv("TASKLIST_TASKS_LIMIT", 100))
+app.config["TEMPLATE_CATALOG_POLL_INTERVAL"] = int(os.getenv("TEMPLATE_CATALOG_POLL_INTERVAL", 60))
+app.config["TEMPLATE_CATALOG_MAX_AGE"] = int(os.getenv("TEMPLATE_CATALOG_MAX_AGE", 3600))
+app.config["TASKS_BULK_MAX"] = int(os.getenv("TASKS_BULK_MAX", 500))
+app.config["TASKS_IMPORT_CHUNK_SIZE"] = int(os.getenv("TASKS_IMPORT_CHUNK_SIZE", 1000))
+app.config["TASKS_IMPORT_MAX_ERRORS"] = int(os.getenv("TASKS_IMPORT_MAX_ERRORS", 100))
+app.config["TASKS_EXPORT_BATCH_SIZE"] = int(os.getenv("TASKS_EXPORT_BATCH_SIZE", 1000))
+app.config["RESPONSE_CACHE_TTL"] = int(os.getenv("RESPONSE_CACHE_TTL", 30))
+app.config["RESPONSE_CACHE_MAX_ENTRIES"] = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+app.config["RESPONSE_CACHE_REDIS_URL"] = os.getenv("RESPONSE_CACHE_REDIS_URL")
+app.config["FEATURED_TASKS_REFRESH_INTERVAL"] = int(os.getenv("FEATURED_TASKS_REFRESH_INTERVAL", 60))
+app.config["UPCOMING_TASKS_HORIZON_DAYS"] = int(os.getenv("UPCOMING_TASKS_HORIZON_DAYS", 30))
+app.config["UPCOMING_TASKS_LIMIT"] = int(os.getenv("UPCOMING_TASKS_LIMIT", 5))
+app.config["DEADLINE_REMINDER_WINDOW_MINUTES"] = int(os.getenv("DEADLINE_REMINDER_WINDOW_MINUTES", 60))
+app.config["DEADLINE_REMINDER_INTERVAL"] = int(os.getenv("DEADLINE_REMINDER_INTERVAL", 300))
+app.config["SCHEDULER_ENABLED"] = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
 
 
 db.init_app(app)
 migrate = Migrate(app, db)
 #socketio = SocketIO(app, cors_allowed_origins="*", async_mode="gevent")
 jwt = JWTManager(app)
+revoked_tokens.init_app(app)
+scheduler = Scheduler(app)
+password_hasher.init_app(app)
+user_profiles.init_app(app)
+template_catalog.init_app(app)
+response_cache.init_app(app)
+response_cache.watch(Task, TaskList, TaskAssignment, TaskCounter, User)
+featured_tasks.init_app(app)
+commands.init_app(app)
 
 from views import (
     user_bp, auth_bp, tasklist_bp, task_bp,
     task_assignment_bp, comments_bp, notifications_bp, task_stats_bp
 )
+from views.notifications import check_task_deadlines
 
 app.register_blueprint(user_bp)
 app.register_blueprint(auth_bp)
@@ -55,12 +106,32 @@ app.register_blueprint(notifications_bp)
 app.register_blueprint(task_stats_bp)
 
 
+# Hashing-pool workers re-import this module; only the serving process warms the caches.
+if multiprocessing.current_process().name == "MainProcess":
+    with app.app_context():
+        try:
+            template_catalog.reload()
+            featured_tasks.refresh()
+        except SQLAlchemyError as e:
+            # e.g. before the first migration; both load on first use instead.
+            logging.getLogger(__name__).warning("Tasklist templates and featured tasks not loaded at startup: %s", e.__class__.__name__)
+
+
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
-    jti = jwt_payload["jti"]
-    token = db.session.query(TokenBlocklist.id).filter_by(jti=jti).scalar()
+    return revoked_tokens.is_revoked(jwt_payload["jti"])
 
-    return token is not None
+scheduler.add_job(
+    "prune-blocklist",
+    lambda: revoked_tokens.prune(app.config["BLOCKLIST_PRUNE_BATCH_SIZE"]),
+    app.config["BLOCKLIST_PRUNE_INTERVAL"]
+)
+scheduler.add_job("refresh-featured-tasks", featured_tasks.refresh, app.config["FEATURED_TASKS_REFRESH_INTERVAL"])
+scheduler.add_job(
+    "deadline-reminders",
+    lambda: check_task_deadlines(timedelta(minutes=app.config["DEADLINE_REMINDER_WINDOW_MINUTES"])),
+    app.config["DEADLINE_REMINDER_INTERVAL"]
+)
 
 @app.route("/")
 def index():
@@ -0,0 +1,266 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, or_, and_
+from models import db, TokenBlocklist
+
+logger = logging.getLogger(__name__)
+
+
+def _to_timestamp(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys.
+
+    Sized from the expected number of keys and the target false-positive
+    rate; membership tests never miss a key that was added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.num_bits = max(int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def false_positive_rate(self):
+        """Estimated probability that an absent key tests as present."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    @property
+    def memory_bytes(self):
+        return len(self._bits)
+
+
+class RevokedTokenCache:
+    """Process-local view of the revoked JWT ids stored in TokenBlocklist.
+
+    Every worker keeps a Bloom filter of the revoked ids and polls a cheap
+    version counter (max id, row count) from the database at most once per
+    BLOCKLIST_POLL_INTERVAL seconds, loading the new rows when it moves.
+    A filter miss means the token is not revoked and costs no query; only a
+    filter hit falls through to the indexed jti lookup, whose answer is
+    cached until the token expires (its stored exp, or
+    JWT_ACCESS_TOKEN_EXPIRES after revocation for older rows).
+    """
+
+    def __init__(self, app=None):
+        self.ttl = timedelta(days=7)
+        self.poll_interval = 5
+        self.min_capacity = 10000
+        self.error_rate = 0.01
+        self._filter = BloomFilter(self.min_capacity, self.error_rate)
+        self._revoked = {}
+        self._false_positives = set()
+        self._version = None
+        self._next_poll = 0.0
+        self._lookups = 0
+        self._filter_hits = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        ttl = app.config.get("JWT_ACCESS_TOKEN_EXPIRES", self.ttl)
+        if isinstance(ttl, int) and not isinstance(ttl, bool):
+            ttl = timedelta(seconds=ttl)
+        self.ttl = ttl if isinstance(ttl, timedelta) else None
+        self.poll_interval = app.config.get("BLOCKLIST_POLL_INTERVAL", self.poll_interval)
+        self.min_capacity = app.config.get("BLOCKLIST_BLOOM_CAPACITY", self.min_capacity)
+        self.error_rate = app.config.get("BLOCKLIST_BLOOM_ERROR_RATE", self.error_rate)
+        app.extensions["revoked_tokens"] = self
+
+    def _expiry(self, revoked_at, expires_at=None):
+        if expires_at is not None:
+            return _to_timestamp(expires_at)
+        if self.ttl is None:
+            return float("inf")
+        return _to_timestamp(revoked_at) + self.ttl.total_seconds()
+
+    def _live(self, now):
+        """Filter matching blocklist rows whose token could still be presented."""
+        if self.ttl is None:
+            return or_(TokenBlocklist.expires_at.is_(None), TokenBlocklist.expires_at > now)
+        return or_(
+            TokenBlocklist.expires_at > now,
+            and_(TokenBlocklist.expires_at.is_(None), TokenBlocklist.created_at >= now - self.ttl)
+        )
+
+    def add(self, jti, expires_at=None):
+        """Records a revocation made by this worker so it applies immediately."""
+        expiry = expires_at if expires_at is not None else self._expiry(datetime.now(timezone.utc))
+        with self._lock:
+            self._filter.add(jti)
+            self._revoked[jti] = expiry
+            self._false_positives.discard(jti)
+
+    def is_revoked(self, jti):
+        self.sync()
+        with self._lock:
+            self._lookups += 1
+            expiry = self._revoked.get(jti)
+            if expiry is not None:
+                if expiry > time.time():
+                    return True
+                del self._revoked[jti]
+                return False
+            if jti not in self._filter or jti in self._false_positives:
+                return False
+            self._filter_hits += 1
+
+        row = (
+            db.session.query(TokenBlocklist.created_at, TokenBlocklist.expires_at)
+            .filter(TokenBlocklist.jti == jti, self._live(datetime.utcnow()))
+            .first()
+        )
+
+        with self._lock:
+            if row is None:
+                if len(self._false_positives) >= self.min_capacity:
+                    self._false_positives.clear()
+                self._false_positives.add(jti)
+                return False
+            expiry = self._expiry(*row)
+            if expiry <= time.time():
+                return False
+            self._revoked[jti] = expiry
+            return True
+
+    def _sweep(self):
+        """Drops cached revocations whose tokens have expired and can no longer be presented."""
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, expiry in self._revoked.items() if expiry <= now]
+            for jti in expired:
+                del self._revoked[jti]
+        if expired:
+            logger.debug("Swept %d expired revocations", len(expired))
+
+    def sync(self, force=False):
+        """Brings the filter up to date if the blocklist changed since the last poll.
+
+        New revocations only add rows, so the rows above the last seen id are
+        added to the current filter. The filter is rebuilt from scratch when
+        rows were deleted (a prune), when ids committed out of order left a
+        gap, or when it has filled up to its capacity. Every poll also sweeps
+        expired entries out of the revocation cache.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+        self._sweep()
+
+        version = tuple(db.session.query(func.max(TokenBlocklist.id), func.count(TokenBlocklist.id)).one())
+        if not force and version == self._version:
+            return
+        if not force and self._extend(version):
+            return
+
+        query = db.session.query(TokenBlocklist.jti).filter(self._live(datetime.utcnow()))
+        jtis = [jti for (jti,) in query]
+
+        bloom = BloomFilter(max(self.min_capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+
+        with self._lock:
+            self._filter = bloom
+            self._false_positives = set()
+            self._version = version
+
+        logger.info(
+            "Rebuilt token blocklist filter: %d entries, %d bytes, estimated false-positive rate %.5f",
+            bloom.count, bloom.memory_bytes, bloom.false_positive_rate()
+        )
+
+    def _extend(self, version):
+        """Adds the rows inserted since the last sync to the filter; returns False if it must be rebuilt."""
+        if self._version is None or self._version[0] is None:
+            return False
+        (last_id, last_count), (max_id, count) = self._version, version
+        if max_id is None or max_id <= last_id or count <= last_count:
+            return False
+
+        jtis = [
+            jti for (jti,) in db.session.query(TokenBlocklist.jti).filter(
+                TokenBlocklist.id > last_id, TokenBlocklist.id <= max_id
+            )
+        ]
+        # Anything else means rows were deleted or committed below last_id.
+        if last_count + len(jtis) != count or self._filter.count + len(jtis) > self._filter.capacity:
+            return False
+
+        with self._lock:
+            for jti in jtis:
+                self._filter.add(jti)
+                self._false_positives.discard(jti)
+            self._version = version
+        logger.debug("Added %d revoked tokens to the blocklist filter", len(jtis))
+        return True
+
+    def prune(self, batch_size=1000):
+        """Deletes blocklist rows for tokens that have expired, one batch per commit.
+
+        Rows written before expires_at existed are treated as dead once they
+        are older than the access-token lifetime. Returns the number of rows
+        deleted.
+        """
+        now = datetime.utcnow()
+        dead = TokenBlocklist.expires_at <= now
+        if self.ttl is not None:
+            dead = or_(dead, and_(TokenBlocklist.expires_at.is_(None), TokenBlocklist.created_at < now - self.ttl))
+
+        deleted = 0
+        while True:
+            ids = [row_id for (row_id,) in db.session.query(TokenBlocklist.id).filter(dead).limit(batch_size)]
+            if not ids:
+                break
+            db.session.query(TokenBlocklist).filter(TokenBlocklist.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+            if len(ids) < batch_size:
+                break
+
+        logger.info("Pruned %d expired token blocklist rows", deleted)
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": self._filter.count,
+                "capacity": self._filter.capacity,
+                "bits": self._filter.num_bits,
+                "hashes": self._filter.num_hashes,
+                "memory_bytes": self._filter.memory_bytes,
+                "target_false_positive_rate": self._filter.error_rate,
+                "estimated_false_positive_rate": self._filter.false_positive_rate(),
+                "lookups": self._lookups,
+                "filter_hits": self._filter_hits,
+                "false_positives": len(self._false_positives),
+            }
+
+
+revoked_tokens = RevokedTokenCache()
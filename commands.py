@@ -0,0 +1,136 @@
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from blocklist import revoked_tokens
+from hashing import BENCHMARK_METHODS, benchmark, password_hasher
+from models import db, Task, TaskList, User
+from serializers import task_serializer
+from task_counters import reconcile
+from task_io import IMPORT_FORMATS, format_for, import_tasks, read_rows
+from tasklist_templates import template_catalog
+from views.notifications import check_task_deadlines
+
+
+@click.command("blocklist-stats")
+@with_appcontext
+def blocklist_stats():
+    """Builds the token blocklist filter and prints its size and error rate."""
+    revoked_tokens.sync(force=True)
+    for key, value in revoked_tokens.stats().items():
+        print(f"{key}: {value}")
+
+
+@click.command("prune-blocklist")
+@click.option("--batch-size", default=None, type=int, help="Rows deleted per transaction.")
+@with_appcontext
+def prune_blocklist(batch_size):
+    """Deletes token blocklist rows whose tokens have expired."""
+    deleted = revoked_tokens.prune(batch_size or current_app.config["BLOCKLIST_PRUNE_BATCH_SIZE"])
+    print(f"Deleted {deleted} expired token blocklist rows")
+
+
+@click.command("benchmark-hashing")
+@click.option("--method", "methods", multiple=True, help="Hash method to measure, e.g. scrypt:32768:8:1. Repeatable.")
+@click.option("--duration", default=2.0, help="Seconds to hash for per method.")
+@click.option("--processes", default=None, type=int, help="Cores to load; defaults to all of them.")
+@with_appcontext
+def benchmark_hashing(methods, duration, processes):
+    """Measures password hashes per second per core for candidate hash costs."""
+    methods = methods or BENCHMARK_METHODS + (current_app.config["PASSWORD_HASH_METHOD"],)
+    for result in benchmark(dict.fromkeys(methods), duration, processes):
+        marker = "*" if result["method"] == password_hasher.method else " "
+        print(
+            f"{marker} {result['method']:<24} {result['hashes_per_second_per_core']:>10.2f} hashes/s/core "
+            f"{result['hashes_per_second']:>10.2f} hashes/s total {result['latency_ms']:>9.2f} ms/hash"
+        )
+
+
+@click.command("benchmark-serializers")
+@click.option("--rows", default=20000, help="Number of in-memory tasks to serialize.")
+@with_appcontext
+def benchmark_serializers(rows):
+    """Compares Task.to_dict() with the compiled task serializer in rows per second."""
+    now = datetime.utcnow()
+    tasks = [
+        Task(id=i, title=f"Task {i}", description="Benchmark task", due_date=now, priority="medium",
+             status="pending", created_at=now, updated_at=now, tasklist_id=1)
+        for i in range(rows)
+    ]
+    for name, serialize in (("to_dict", Task.to_dict), ("task_serializer", task_serializer)):
+        started = time.perf_counter()
+        for task in tasks:
+            serialize(task)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<16} {rows / elapsed:>12.0f} rows/s")
+
+
+@click.command("import-tasks")
+@click.argument("source", type=click.File("rb"))
+@click.option("--tasklist-id", required=True, type=int, help="Tasklist the tasks are added to.")
+@click.option("--format", "fmt", type=click.Choice(IMPORT_FORMATS), help="Defaults to the file extension.")
+@click.option("--chunk-size", default=None, type=int, help="Rows inserted per statement.")
+@with_appcontext
+def import_tasks_command(source, tasklist_id, fmt, chunk_size):
+    """Imports tasks from a CSV or NDJSON file ("-" for stdin) into a tasklist."""
+    fmt = fmt or format_for(source.name)
+    if fmt is None:
+        raise click.UsageError("Cannot tell the format from the file name; pass --format.")
+    tasklist = db.session.get(TaskList, tasklist_id)
+    if tasklist is None:
+        raise click.UsageError(f"Tasklist {tasklist_id} does not exist.")
+    workspace_id = db.session.query(User.workspace_id).filter_by(id=tasklist.user_id).scalar()
+
+    summary = import_tasks(
+        read_rows(source, fmt),
+        tasklist.id,
+        workspace_id,
+        chunk_size=chunk_size or current_app.config["TASKS_IMPORT_CHUNK_SIZE"],
+        max_errors=current_app.config["TASKS_IMPORT_MAX_ERRORS"],
+        progress=lambda imported, rejected: click.echo(f"{imported} imported, {rejected} rejected", err=True)
+    )
+    for error in summary["errors"]:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    if tasklist.is_template:
+        template_catalog.invalidate()
+    print(f"Imported {summary['imported']} tasks, rejected {summary['rejected']} rows")
+
+
+@click.command("reconcile-task-counters")
+@click.option("--fix", is_flag=True, help="Rebuild the counters from the tasks table.")
+@with_appcontext
+def reconcile_task_counters(fix):
+    """Recounts tasks per tasklist and status and reports where task_counters has drifted."""
+    drift = reconcile(fix=fix)
+    for row in drift:
+        print(
+            f"tasklist {row['tasklist_id']} {row['status']}: stored {row['stored']}, "
+            f"actual {row['expected']} (workspace {row['workspace_id']})"
+        )
+    if not drift:
+        print("task_counters matches the tasks table")
+    elif fix:
+        print(f"Rebuilt task_counters; fixed {len(drift)} drifted counters")
+    else:
+        print(f"{len(drift)} counters drifted; run with --fix to rebuild them")
+
+
+@click.command("send-deadline-reminders")
+@click.option("--window", default=None, type=int, help="Minutes ahead to look for deadlines.")
+@with_appcontext
+def send_deadline_reminders(window):
+    """Notifies assignees of open tasks due soon that they have not been reminded of yet."""
+    window = timedelta(minutes=window or current_app.config["DEADLINE_REMINDER_WINDOW_MINUTES"])
+    print(f"Sent {check_task_deadlines(window)} deadline reminders")
+
+
+COMMANDS = (blocklist_stats, prune_blocklist, benchmark_hashing, benchmark_serializers, import_tasks_command, reconcile_task_counters, send_deadline_reminders)
+
+
+def init_app(app):
+    """Registers the maintenance commands on app.cli."""
+    for command in COMMANDS:
+        app.cli.add_command(command)
@@ -0,0 +1,38 @@
+import hashlib
+from flask import current_app, make_response, request
+from sqlalchemy import func
+from models import Task
+
+
+def task_version(query, *extra):
+    """Cheap change marker for the tasks a query matches: row count and latest updated_at.
+
+    Runs one aggregate query instead of loading rows. Any insert or update
+    moves updated_at and any delete moves the count. Extra aggregates can be
+    added for data that changes without a write, such as overdue counts.
+    """
+    return tuple(query.with_entities(func.count(Task.id), func.max(Task.updated_at), *extra).order_by(None).one())
+
+
+def weak_etag(*parts):
+    """Builds an ETag value from the version markers and the request's query string."""
+    key = repr((request.path, sorted(request.args.items(multi=True))) + parts)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def conditional_response(etag, build):
+    """Returns 304 if the client already has this ETag, otherwise build()'s response tagged with it.
+
+    build is only called on a miss, so matching requests skip serialization.
+    Responses are private and must be revalidated, which suits polling clients.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import func, select
+from models import db, Task
+from serializers import task_serializer
+
+logger = logging.getLogger(__name__)
+
+FEATURED_PRIORITIES = ("low", "medium", "high")
+
+FeaturedSnapshot = namedtuple("FeaturedSnapshot", ["tasks", "body", "etag", "loaded_at"])
+
+
+class FeaturedTasks:
+    """In-memory snapshot of the landing page's featured tasks.
+
+    The newest task of each featured priority is fetched with one
+    row_number() query and pre-rendered to JSON. The scheduler refreshes it
+    every FEATURED_TASKS_REFRESH_INTERVAL seconds, so /tasks/featured never
+    touches the database however much traffic it gets. A request that finds
+    the snapshot missing or more than two intervals old, e.g. because the
+    scheduler is off, refreshes it itself.
+    """
+
+    def __init__(self, app=None):
+        self.refresh_interval = 60
+        self._snapshot = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get("FEATURED_TASKS_REFRESH_INTERVAL", self.refresh_interval)
+        app.extensions["featured_tasks"] = self
+
+    def _query(self):
+        newest_first = func.row_number().over(
+            partition_by=Task.priority, order_by=(Task.created_at.desc(), Task.id.desc())
+        ).label("position")
+        ranked = (
+            select(*task_serializer.columns(), newest_first)
+            .where(Task.priority.in_(FEATURED_PRIORITIES))
+            .subquery()
+        )
+        return select(*(ranked.c[name] for name in task_serializer.fields)).where(ranked.c.position == 1)
+
+    def refresh(self):
+        """Reloads the featured tasks and swaps in a new snapshot."""
+        with self._lock:
+            newest = {row.priority: task_serializer(row) for row in db.session.execute(self._query())}
+            tasks = tuple(newest[priority] for priority in FEATURED_PRIORITIES if priority in newest)
+            body = json.dumps(tasks, sort_keys=True, separators=(",", ":")).encode()
+            self._snapshot = FeaturedSnapshot(tasks, body, hashlib.sha256(body).hexdigest()[:32], time.monotonic())
+            logger.debug("Refreshed %d featured tasks", len(tasks))
+            return self._snapshot
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.loaded_at >= 2 * self.refresh_interval:
+            return self.refresh()
+        return snapshot
+
+
+featured_tasks = FeaturedTasks()
@@ -0,0 +1,206 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import jsonify, make_response
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+BENCHMARK_METHODS = (
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+    "scrypt:65536:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:1000000",
+)
+
+
+def pool_context():
+    """Start method for hashing pools.
+
+    The pool is created from a request thread while scheduler threads are
+    running, and forking a multi-threaded process can deadlock the child,
+    so workers come from a forkserver (or are spawned where there is none).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def normalize_method(method):
+    """Spells out werkzeug's defaults so methods can be compared with stored hashes."""
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2":
+        if not args:
+            return f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+        if len(args) == 1:
+            return f"pbkdf2:{args[0]}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+def _hashes_per_second(method, duration):
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        generate_password_hash("benchmark-password", method)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def benchmark(methods=BENCHMARK_METHODS, duration=2.0, processes=None):
+    """Measures hashes per second per core for each method with every core busy."""
+    processes = processes or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(max_workers=processes, mp_context=pool_context()) as executor:
+        for method in methods:
+            rates = list(executor.map(_hashes_per_second, [method] * processes, [duration] * processes))
+            per_core = sum(rates) / processes
+            results.append({
+                "method": normalize_method(method),
+                "hashes_per_second_per_core": round(per_core, 2),
+                "hashes_per_second": round(per_core * processes, 2),
+                "latency_ms": round(1000 / per_core, 2) if per_core else None,
+            })
+    return results
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing pool cannot take another job."""
+
+
+class PasswordHasher:
+    """Runs werkzeug password hashing and verification on a process pool.
+
+    scrypt/pbkdf2 are deliberately CPU-bound, so running them inline lets a
+    burst of logins pin every worker. Jobs go to a pool of HASH_POOL_WORKERS
+    processes instead, with at most HASH_POOL_MAX_PENDING queued or running
+    at once; beyond that (or after HASH_POOL_TIMEOUT seconds) callers get
+    HashingPoolBusy, which is turned into a 503 with Retry-After. If a
+    worker dies, the jobs it took down get the same 503 and the next job
+    starts a fresh pool. Setting HASH_POOL_WORKERS to 0 hashes inline. New
+    hashes use PASSWORD_HASH_METHOD.
+    """
+
+    def __init__(self, app=None):
+        self.workers = os.cpu_count() or 1
+        self.max_pending = self.workers * 4
+        self.timeout = 10
+        self.retry_after = 1
+        self.method = normalize_method("scrypt")
+        self._executor = None
+        self._pid = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._rejected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = app.config.get("HASH_POOL_WORKERS", self.workers)
+        self.max_pending = app.config.get("HASH_POOL_MAX_PENDING", max(self.workers, 1) * 4)
+        self.timeout = app.config.get("HASH_POOL_TIMEOUT", self.timeout)
+        self.retry_after = app.config.get("HASH_POOL_RETRY_AFTER", self.retry_after)
+        self.method = normalize_method(app.config.get("PASSWORD_HASH_METHOD", self.method))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions["password_hasher"] = self
+        app.register_error_handler(HashingPoolBusy, self._busy_response)
+
+    def _busy_response(self, error):
+        response = make_response(jsonify({"error": "Server is busy, please try again shortly"}), 503)
+        response.headers["Retry-After"] = str(self.retry_after)
+        return response
+
+    def _get_executor(self):
+        # Pools do not survive a fork, so each worker process builds its own.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context())
+                self._pid = os.getpid()
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Drops a broken pool so the next job builds a new one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        logger.warning("Password hashing pool broke; starting a new one")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reject(self, operation):
+        with self._lock:
+            self._rejected += 1
+        return HashingPoolBusy(operation)
+
+    def _record(self, operation, started):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._latencies.setdefault(operation, deque(maxlen=1000)).append(elapsed)
+        logger.debug("%s took %.1f ms", operation, elapsed)
+
+    def _run(self, operation, func, *args):
+        started = time.perf_counter()
+        if not self.workers:
+            try:
+                return func(*args)
+            finally:
+                self._record(operation, started)
+
+        if not self._slots.acquire(blocking=False):
+            raise self._reject(operation)
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._discard_executor(executor)
+            raise self._reject(operation)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise self._reject(operation)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise self._reject(operation)
+        finally:
+            self._record(operation, started)
+
+    def generate(self, password):
+        return self._run("generate", generate_password_hash, password, self.method)
+
+    def needs_rehash(self, pwhash):
+        """True if pwhash was made with parameters other than PASSWORD_HASH_METHOD."""
+        return normalize_method(pwhash.split("$", 1)[0]) != self.method
+
+    def check(self, pwhash, password):
+        return self._run("check", check_password_hash, pwhash, password)
+
+    def metrics(self):
+        with self._lock:
+            result = {"method": self.method, "workers": self.workers, "max_pending": self.max_pending, "rejected": self._rejected}
+            for operation, samples in self._latencies.items():
+                ordered = sorted(samples)
+                result[operation] = {
+                    "samples": len(ordered),
+                    "avg_ms": round(sum(ordered) / len(ordered), 2),
+                    "p50_ms": round(ordered[len(ordered) // 2], 2),
+                    "p95_ms": round(ordered[int(len(ordered) * 0.95)], 2),
+                    "max_ms": round(ordered[-1], 2),
+                }
+            return result
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import namedtuple
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from models import db, User
+
+UserProfile = namedtuple("UserProfile", ["id", "role", "workspace_id", "notifications_enabled"])
+
+
+class UserProfileCache:
+    """Short-lived, process-local cache of the user fields checked on most requests.
+
+    Holds role, workspace and notification settings for USER_CACHE_TTL
+    seconds so decorators such as admin_required can answer without a
+    query. Views that change those fields call invalidate(); other workers
+    may serve the old values until their entry expires. A TTL of 0 turns the
+    cache off.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self._entries = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("USER_CACHE_TTL", self.ttl)
+        app.extensions["user_profiles"] = self
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, profile = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return profile
+
+    def set(self, profile):
+        if self.ttl:
+            with self._lock:
+                self._entries[profile.id] = (time.monotonic() + self.ttl, profile)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+user_profiles = UserProfileCache()
+
+
+def current_user_id():
+    identity = get_jwt_identity()
+    return int(identity) if identity is not None else None
+
+
+def get_current_user():
+    """Returns the User for the request's JWT, loading it at most once per request."""
+    if "current_user" not in g:
+        user_id = current_user_id()
+        g.current_user = db.session.get(User, user_id) if user_id is not None else None
+        if g.current_user is not None:
+            user_profiles.set(_profile_of(g.current_user))
+    return g.current_user
+
+
+def get_current_user_profile():
+    """Returns the cached UserProfile for the request's JWT, or None if the user is gone."""
+    user = g.get("current_user")
+    if user is not None:
+        return _profile_of(user)
+
+    profile = user_profiles.get(current_user_id())
+    if profile is None:
+        user = get_current_user()
+        profile = _profile_of(user) if user is not None else None
+    return profile
+
+
+def _profile_of(user):
+    return UserProfile(user.id, user.role, user.workspace_id, user.notifications_enabled)
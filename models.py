@@ -1,11 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.dialects.postgresql import ENUM
 from datetime import datetime
 from uuid import uuid4
 
 db = SQLAlchemy()
 
+
+def upsert_insert(model):
+    """INSERT for model that supports on_conflict_do_*(), or None if the database has no ON CONFLICT."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    return None
+
 priority_enum = ENUM("low", "medium", "high", "urgent", name="priority_levels", create_type=True)
 status_enum = ENUM("pending", "in-progress", "completed", "todo", name="task_status", create_type=True)
 
@@ -73,7 +84,7 @@ class TaskList(db.Model, SerializerMixin):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     is_template = db.Column(db.Boolean, default=False)
 
     tasks = db.relationship("Task", backref="tasklist", cascade="all, delete-orphan")
@@ -85,18 +96,6 @@ class TaskList(db.Model, SerializerMixin):
     )
 
 
-def preload_task_templates():
-    template_names = ["To-Do", "Doing", "Testing", "Done"]
-    
-    for name in template_names:
-        existing_template = TaskList.query.filter_by(name=name, is_template=True).first()
-        if not existing_template:
-            template = TaskList(name=name, is_template=True)
-            db.session.add(template)
-    
-    db.session.commit()
-
-
 class Task(db.Model, SerializerMixin):
     __tablename__ = "tasks"
 
@@ -110,6 +109,8 @@ class Task(db.Model, SerializerMixin):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     tasklist_id = db.Column(db.Integer, db.ForeignKey("tasklists.id", ondelete="CASCADE"), nullable=False)
+    # Denormalized from the tasklist owner so tasks can be scoped without joins.
+    workspace_id = db.Column(db.String(36), db.ForeignKey("workspaces.id", ondelete="SET NULL"), nullable=True)
     
     assignments = db.relationship("TaskAssignment", back_populates="task", cascade="all, delete-orphan")
     comments = db.relationship("Comment", back_populates="task", cascade="all, delete-orphan")
@@ -122,6 +123,33 @@ class Task(db.Model, SerializerMixin):
         "-notifications.task"
     )
 
+    __table_args__ = (
+        # Cover the task stats aggregates, with and without grouping by priority.
+        db.Index("ix_tasks_workspace_id_status_due_date", "workspace_id", "status", "due_date"),
+        db.Index("ix_tasks_workspace_id_priority_status", "workspace_id", "priority", "status"),
+        db.Index("ix_tasks_workspace_id_due_date", "workspace_id", "due_date"),
+        db.Index("ix_tasks_workspace_id_created_at", "workspace_id", "created_at", "id"),
+        db.Index("ix_tasks_tasklist_id_created_at", "tasklist_id", "created_at"),
+        # Upcoming deadlines only ever look at open tasks. (due_date, id) is their
+        # sort order, and the trailing columns make the scan index-only.
+        db.Index(
+            "ix_tasks_open_due_date", "due_date", "id", "tasklist_id", "status", "title",
+            postgresql_where=db.text("status != 'completed'"),
+            sqlite_where=db.text("status != 'completed'")
+        ),
+    )
+
+
+class TaskCounter(db.Model):
+    """Number of tasks per tasklist and status, kept up to date by the task write paths."""
+    __tablename__ = "task_counters"
+
+    tasklist_id = db.Column(db.Integer, db.ForeignKey("tasklists.id", ondelete="CASCADE"), primary_key=True)
+    status = db.Column(status_enum, primary_key=True)
+    # Same as the tasks' workspace_id, so a workspace's counters can be read without joins.
+    workspace_id = db.Column(db.String(36), db.ForeignKey("workspaces.id", ondelete="SET NULL"), nullable=True, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 
 class TaskAssignment(db.Model, SerializerMixin):
     __tablename__ = "task_assignments"
@@ -129,12 +157,20 @@ class TaskAssignment(db.Model, SerializerMixin):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     task_id = db.Column(db.Integer, db.ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    # When the assignee was last reminded of the task's deadline.
+    reminded_at = db.Column(db.DateTime, nullable=True)
 
     user = db.relationship("User", back_populates="tasks_assigned")
     task = db.relationship("Task", back_populates="assignments")
 
     serialize_rules = ("-user", "-task")
 
+    __table_args__ = (
+        db.UniqueConstraint("task_id", "user_id", name="uq_task_assignments_task_id_user_id"),
+        # The unique constraint leads with task_id; this answers "tasks assigned to a user".
+        db.Index("ix_task_assignments_user_id_task_id", "user_id", "task_id"),
+    )
+
 
 class Comment(db.Model, SerializerMixin):
     __tablename__ = "comments"
@@ -169,3 +205,4 @@ class TokenBlocklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, index=True)
     created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values):
+    """Packs keyset values into an opaque, URL-safe token."""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, types):
+    """Unpacks a token from encode_cursor, checking each value against types.
+
+    Raises ValueError if the token is malformed or does not match.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Malformed cursor")
+
+    decoded = []
+    for value, kind in zip(values, types):
+        if value is None and kind is datetime:
+            decoded.append(None)
+        elif kind is datetime and isinstance(value, str):
+            decoded.append(datetime.fromisoformat(value))
+        elif isinstance(value, kind) and not isinstance(value, bool):
+            decoded.append(value)
+        else:
+            raise ValueError("Malformed cursor")
+    return decoded
+
+
+def keyset_after(sort_column, id_column, sort_value, last_id):
+    """Filter for rows after (sort_value, last_id) in ascending order, NULLs last."""
+    if sort_value is None:
+        return and_(sort_column.is_(None), id_column > last_id)
+    return or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > last_id),
+        sort_column.is_(None)
+    )
+
+
+def keyset_order(sort_column, id_column):
+    return (sort_column.asc().nulls_last(), id_column.asc())
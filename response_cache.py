@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes
+
+# Session.info key collecting what the current transaction wrote; ALL_WORKSPACES means "unknown".
+PENDING_KEY = "response_cache.pending"
+ALL_WORKSPACES = "*"
+
+
+class CacheBackend(ABC):
+    """Storage behind ResponseCache.
+
+    MemoryBackend keeps entries in this process; RedisBackend shares them,
+    and their invalidations, between all workers. Values are JSON-compatible.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Returns the value stored under key, or None if it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Stores value under key for ttl seconds."""
+
+    @abstractmethod
+    def generation(self, tag):
+        """Returns the current generation number of tag, 0 if it was never bumped."""
+
+    @abstractmethod
+    def bump(self, tag):
+        """Atomically increments the generation of tag. Generations must never be evicted."""
+
+    def __len__(self):
+        return 0
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU of at most max_entries entries, each with its own expiry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, tag):
+        return self._generations.get(tag, 0)
+
+    def bump(self, tag):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """Entries and generations in Redis, shared by every worker.
+
+    client is a redis.Redis; entries expire through Redis' own TTLs and
+    generations are plain counters bumped with INCR.
+    """
+
+    def __init__(self, client, prefix="response-cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value, separators=(",", ":")), ex=max(int(ttl), 1))
+
+    def generation(self, tag):
+        return int(self.client.get(f"{self.prefix}generation:{tag}") or 0)
+
+    def bump(self, tag):
+        self.client.incr(f"{self.prefix}generation:{tag}")
+
+
+class ResponseCache:
+    """Short-lived cache for the payloads of read-heavy dashboard endpoints.
+
+    Entries are keyed by endpoint, user and query string, and live for
+    RESPONSE_CACHE_TTL seconds. Each key also carries the generation of its
+    invalidation tag: the caller's workspace, "personal" for users without
+    one, or "public" for anonymous endpoints. Committed writes to the models
+    passed to watch() bump the tags they affect, so stale entries are never
+    read again and simply age out. A TTL of 0 turns the cache off, and
+    RESPONSE_CACHE_REDIS_URL switches to the shared RedisBackend.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.backend = MemoryBackend()
+        self._counts = {}
+        self._tables = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        self.ttl = app.config.get("RESPONSE_CACHE_TTL", self.ttl)
+        if backend is None and app.config.get("RESPONSE_CACHE_REDIS_URL"):
+            import redis
+
+            backend = RedisBackend(redis.Redis.from_url(app.config["RESPONSE_CACHE_REDIS_URL"]))
+        self.backend = backend or MemoryBackend(app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+        app.extensions["response_cache"] = self
+
+    def watch(self, *models):
+        """Invalidates cached payloads whenever a transaction that wrote to these models commits."""
+        self._tables |= {model.__table__.name for model in models}
+        for name, listener in (
+            ("after_flush", self._after_flush),
+            ("do_orm_execute", self._do_orm_execute),
+            ("after_commit", self._after_commit),
+            ("after_soft_rollback", self._after_rollback),
+        ):
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+
+    def _record(self, session, workspace_ids):
+        session.info.setdefault(PENDING_KEY, set()).update(workspace_ids)
+
+    def _affected(self, table):
+        """None if writes to table do not invalidate, else whether its rows name their workspace."""
+        if table is None or table.name not in self._tables:
+            return None
+        return "workspace_id" in table.c
+
+    def _after_flush(self, session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            has_workspace = self._affected(getattr(type(obj), "__table__", None))
+            if has_workspace is None:
+                continue
+            if not has_workspace:
+                self._record(session, [None])
+                continue
+            # Both the old and the new workspace of a moved row are affected.
+            history = attributes.get_history(obj, "workspace_id", attributes.PASSIVE_NO_INITIALIZE)
+            self._record(session, history.sum() or [ALL_WORKSPACES])
+
+    def _do_orm_execute(self, state):
+        if not (state.is_insert or state.is_update or state.is_delete):
+            return
+        has_workspace = self._affected(getattr(state.statement, "table", None))
+        if has_workspace is None:
+            return
+        rows = state.parameters if isinstance(state.parameters, list) else [state.parameters or {}]
+        if not has_workspace:
+            self._record(state.session, [None])
+        elif state.is_insert and all("workspace_id" in row for row in rows):
+            self._record(state.session, [row["workspace_id"] for row in rows])
+        else:
+            # Bulk UPDATE/DELETE statements do not say which workspaces they touch.
+            self._record(state.session, [ALL_WORKSPACES])
+
+    def _after_commit(self, session):
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending is None:
+            return
+        if ALL_WORKSPACES in pending:
+            self.backend.bump(ALL_WORKSPACES)
+        self.invalidate(pending - {ALL_WORKSPACES})
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(PENDING_KEY, None)
+
+    @staticmethod
+    def _tag(user):
+        if user is None:
+            return "public"
+        if user.workspace_id:
+            return f"workspace:{user.workspace_id}"
+        return "personal"
+
+    def _count(self, endpoint, hit):
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def get_or_set(self, endpoint, user, build):
+        """Returns the cached payload for this endpoint, user and query string, or build()'s.
+
+        user is the caller's UserProfile, or None for anonymous endpoints.
+        """
+        if not self.ttl:
+            return build()
+
+        tag = self._tag(user)
+        key = "|".join((
+            endpoint,
+            str(user.id) if user is not None else "-",
+            tag,
+            str(self.backend.generation(tag)),
+            str(self.backend.generation(ALL_WORKSPACES)),
+            repr(sorted(request.args.items(multi=True))),
+        ))
+        value = self.backend.get(key)
+        self._count(endpoint, value is not None)
+        if value is None:
+            value = build()
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def invalidate(self, workspace_ids=()):
+        """Drops cached payloads that tasks in these workspaces may appear in.
+
+        Entries for users without a workspace and anonymous entries are
+        always dropped, since they can include tasks from anywhere.
+        """
+        for workspace_id in set(workspace_ids):
+            if workspace_id:
+                self.backend.bump(f"workspace:{workspace_id}")
+        self.backend.bump("personal")
+        self.backend.bump("public")
+
+    def stats(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+                }
+                for endpoint, (hits, misses) in self._counts.items()
+            }
+        return {"ttl": self.ttl, "backend": type(self.backend).__name__, "entries": len(self.backend), "endpoints": endpoints}
+
+
+response_cache = ResponseCache()
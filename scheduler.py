@@ -0,0 +1,66 @@
+import logging
+import multiprocessing
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Runs maintenance jobs periodically on daemon threads.
+
+    Each job gets its own thread and runs inside an application context, so
+    it can use db.session like a view does. Jobs are registered with
+    add_job() and start with the first request the process serves, so CLI
+    commands and pool workers never run them; SCHEDULER_ENABLED turns the
+    whole thing off, e.g. for workers that should only serve requests.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self._jobs = {}
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("SCHEDULER_ENABLED", True)
+        app.extensions["scheduler"] = self
+        app.before_request(self.start)
+
+    def add_job(self, name, func, interval):
+        """Registers func to run every interval seconds; a falsy interval disables it."""
+        if interval:
+            self._jobs[name] = (func, interval)
+
+    def run_job(self, name):
+        func, _ = self._jobs[name]
+        with self.app.app_context():
+            try:
+                return func()
+            except Exception:
+                logger.exception("Scheduled job %s failed", name)
+
+    def _loop(self, name, interval):
+        while not self._stop.wait(interval):
+            self.run_job(name)
+
+    def start(self):
+        if not self.enabled or self._threads:
+            return
+        # Pool workers started with spawn/forkserver re-import the app; they must not run jobs.
+        if multiprocessing.current_process().name != "MainProcess":
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for name, (_, interval) in self._jobs.items():
+                thread = threading.Thread(target=self._loop, args=(name, interval), name=f"scheduler-{name}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
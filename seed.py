@@ -1,5 +1,6 @@
 from app import app
 from models import db, User, TaskList, Task, TaskAssignment, Comment, Notification, Workspace, WorkspaceInvite
+from task_counters import reconcile
 from datetime import datetime
 from uuid import uuid4
 
@@ -42,9 +43,11 @@ with app.app_context():
 
     # Create tasks
     task1 = Task(title="Finish report", description="Complete the annual report.",
-                 due_date=datetime(2025, 3, 1), priority="high", status="todo", tasklist_id=tasklist1.id)
+                 due_date=datetime(2025, 3, 1), priority="high", status="todo", tasklist_id=tasklist1.id,
+                 workspace_id=workspace1.id)
     task2 = Task(title="Buy groceries", description="Milk, eggs, bread.",
-                 due_date=datetime(2025, 3, 2), priority="low", status="todo", tasklist_id=tasklist2.id)
+                 due_date=datetime(2025, 3, 2), priority="low", status="todo", tasklist_id=tasklist2.id,
+                 workspace_id=workspace2.id)
 
     db.session.add_all([task1, task2])
     db.session.commit()
@@ -70,4 +73,7 @@ with app.app_context():
     db.session.add_all([notification1, notification2])
     db.session.commit()
 
+    # Tasks above were added directly, so build their counters in one go.
+    reconcile(fix=True)
+
     print("Database seeded successfully!")
@@ -0,0 +1,79 @@
+from datetime import date, datetime, time
+from functools import lru_cache
+from sqlalchemy import inspect
+from models import Task
+
+
+class FastSerializer:
+    """Column-only replacement for SerializerMixin.to_dict on hot endpoints.
+
+    The field list and a formatter per field are worked out once, when the
+    serializer is built, instead of walking serialize_rules on every call.
+    Only mapped columns are read, so serializing never triggers a lazy load.
+    Dates and times use the model's SerializerMixin formats, so values match
+    what to_dict() produced.
+    """
+
+    def __init__(self, model, fields=None):
+        columns = {attr.key: attr.columns[0] for attr in inspect(model).column_attrs}
+        fields = tuple(fields) if fields else tuple(columns)
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields for {model.__name__}: {', '.join(unknown)}")
+
+        self.model = model
+        self.fields = fields
+        self._extractors = tuple((name, self._formatter(model, columns[name])) for name in fields)
+
+    @staticmethod
+    def _formatter(model, column):
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return None
+        if issubclass(python_type, datetime):
+            return lambda value, fmt=model.datetime_format: value.strftime(fmt)
+        if issubclass(python_type, date):
+            return lambda value, fmt=model.date_format: value.strftime(fmt)
+        if issubclass(python_type, time):
+            return lambda value, fmt=model.time_format: value.strftime(fmt)
+        return None
+
+    def columns(self):
+        """The mapped attributes behind this serializer, for load_only() or select()."""
+        return [getattr(self.model, name) for name in self.fields]
+
+    def __call__(self, obj):
+        data = {}
+        for name, formatter in self._extractors:
+            value = getattr(obj, name)
+            data[name] = formatter(value) if formatter is not None and value is not None else value
+        return data
+
+    def many(self, objs):
+        return [self(obj) for obj in objs]
+
+
+def parse_fields(value, model, extra=()):
+    """Parses a comma-separated ?fields= value into a tuple of field names.
+
+    Returns None when no fields were asked for. Raises ValueError naming any
+    field that is neither a column of model nor one of extra.
+    """
+    if not value:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    allowed = {attr.key for attr in inspect(model).column_attrs} | set(extra)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names or None
+
+
+@lru_cache(maxsize=64)
+def serializer_for(model, fields=None):
+    """Returns a FastSerializer for model restricted to fields, built once per combination."""
+    return FastSerializer(model, fields)
+
+
+task_serializer = serializer_for(Task)
@@ -0,0 +1,97 @@
+from collections import Counter
+from sqlalchemy import func, insert, update
+from models import db, Task, TaskCounter, upsert_insert
+
+
+def adjust_counters(deltas):
+    """Adds {(workspace_id, tasklist_id, status): change} to task_counters.
+
+    Runs in the caller's transaction, so the counters commit or roll back
+    together with the task writes they describe. Uses a single
+    INSERT ... ON CONFLICT DO UPDATE where the database supports it.
+    """
+    rows = [
+        {"workspace_id": workspace_id, "tasklist_id": tasklist_id, "status": status, "count": change}
+        for (workspace_id, tasklist_id, status), change in deltas.items() if change
+    ]
+    if not rows:
+        return
+
+    stmt = upsert_insert(TaskCounter)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tasklist_id", "status"],
+            set_={"count": TaskCounter.count + stmt.excluded["count"], "workspace_id": stmt.excluded.workspace_id}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        updated = db.session.execute(
+            update(TaskCounter)
+            .where(TaskCounter.tasklist_id == row["tasklist_id"], TaskCounter.status == row["status"])
+            .values(count=TaskCounter.count + row["count"], workspace_id=row["workspace_id"])
+        )
+        if not updated.rowcount:
+            db.session.execute(insert(TaskCounter), [row])
+
+
+def task_key(task):
+    """The counter a task is counted under."""
+    return task.workspace_id, task.tasklist_id, task.status
+
+
+def count_moves(moves):
+    """Turns (old key, new key) pairs into counter deltas; None means created or deleted."""
+    deltas = Counter()
+    for old, new in moves:
+        if old == new:
+            continue
+        if old is not None:
+            deltas[old] -= 1
+        if new is not None:
+            deltas[new] += 1
+    return deltas
+
+
+def actual_counts():
+    """{(tasklist_id, status): (workspace_id, count)} straight from the tasks table."""
+    rows = db.session.query(
+        Task.tasklist_id, Task.status, func.max(Task.workspace_id), func.count(Task.id)
+    ).group_by(Task.tasklist_id, Task.status)
+    return {(tasklist_id, status): (workspace_id, count) for tasklist_id, status, workspace_id, count in rows}
+
+
+def reconcile(fix=False):
+    """Compares task_counters with a fresh count of the tasks and lists every difference.
+
+    With fix, the counters are rebuilt from the fresh count in one transaction.
+    """
+    expected = actual_counts()
+    stored = {
+        (counter.tasklist_id, counter.status): (counter.workspace_id, counter.count)
+        for counter in db.session.query(TaskCounter)
+    }
+
+    drift = []
+    for key in sorted(expected.keys() | stored.keys(), key=lambda key: (key[0], str(key[1]))):
+        expected_workspace, expected_count = expected.get(key, (None, 0))
+        stored_workspace, stored_count = stored.get(key, (None, 0))
+        if expected_count != stored_count or (expected_count and expected_workspace != stored_workspace):
+            drift.append({
+                "tasklist_id": key[0],
+                "status": key[1],
+                "expected": expected_count,
+                "stored": stored_count,
+                "workspace_id": expected_workspace,
+            })
+
+    if fix and drift:
+        db.session.query(TaskCounter).delete(synchronize_session=False)
+        if expected:
+            db.session.execute(insert(TaskCounter), [
+                {"tasklist_id": tasklist_id, "status": status, "workspace_id": workspace_id, "count": count}
+                for (tasklist_id, status), (workspace_id, count) in expected.items()
+            ])
+        db.session.commit()
+    return drift
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, Task, priority_enum, status_enum
+from task_counters import adjust_counters
+
+IMPORT_FORMATS = ("csv", "ndjson")
+EXPORT_MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+IMPORT_FIELDS = ("title", "description", "due_date", "priority", "status")
+TITLE_MAX_LENGTH = Task.title.property.columns[0].type.length
+
+
+def parse_due_date(value):
+    """Parses "YYYY-MM-DD HH:MM:SS" or "YYYY-MM-DD"; raises ValueError otherwise."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d")
+
+
+def format_for(filename=None, mimetype=None):
+    """Guesses the import format from a file name or content type, or returns None."""
+    if filename:
+        extension = filename.rsplit(".", 1)[-1].lower()
+        if extension in ("csv", "ndjson", "jsonl"):
+            return "csv" if extension == "csv" else "ndjson"
+    if mimetype in ("text/csv", "application/csv"):
+        return "csv"
+    if mimetype in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream, fmt):
+    """Yields (line number, row) from a binary CSV (with a header row) or NDJSON stream, one row at a time."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, line
+
+
+def validate_row(row):
+    """Returns (column values, None) for a valid row, or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, "Row must be a JSON object"
+
+    # CSV has no nulls, so empty cells mean "not given".
+    row = {field: row.get(field) for field in IMPORT_FIELDS if row.get(field) not in (None, "")}
+    title = row.get("title")
+    if not isinstance(title, str) or not title.strip():
+        return None, "title is required"
+    if len(title) > TITLE_MAX_LENGTH:
+        return None, f"title must be at most {TITLE_MAX_LENGTH} characters"
+
+    values = {
+        "title": title,
+        "description": row.get("description"),
+        "due_date": None,
+        "priority": row.get("priority", "medium"),
+        "status": row.get("status", "pending"),
+    }
+    if values["description"] is not None and not isinstance(values["description"], str):
+        return None, "description must be a string"
+    if values["priority"] not in priority_enum.enums:
+        return None, f"priority must be one of: {', '.join(priority_enum.enums)}"
+    if values["status"] not in status_enum.enums:
+        return None, f"status must be one of: {', '.join(status_enum.enums)}"
+    if "due_date" in row:
+        try:
+            values["due_date"] = parse_due_date(row["due_date"])
+        except (TypeError, ValueError):
+            return None, "Invalid date format"
+    return values, None
+
+
+def import_tasks(rows, tasklist_id, workspace_id, chunk_size=1000, max_errors=100, progress=None):
+    """Inserts the valid rows into a tasklist chunk_size at a time, commits once and returns a summary."""
+    summary = {"imported": 0, "rejected": 0, "errors": []}
+    chunk = []
+
+    def flush():
+        db.session.execute(insert(Task), chunk)
+        adjust_counters(Counter((workspace_id, tasklist_id, row["status"]) for row in chunk))
+        summary["imported"] += len(chunk)
+        chunk.clear()
+        if progress:
+            progress(summary["imported"], summary["rejected"])
+
+    try:
+        for line_number, row in rows:
+            values, error = validate_row(row)
+            if error:
+                summary["rejected"] += 1
+                if len(summary["errors"]) < max_errors:
+                    summary["errors"].append({"line": line_number, "error": error})
+                continue
+            chunk.append(dict(values, tasklist_id=tasklist_id, workspace_id=workspace_id))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return summary
+
+
+def export_rows(rows, serializer, fmt, batch_size=1000, header=True):
+    """Yields rows as CSV or NDJSON text, batch_size rows per chunk; header=False omits the CSV header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer and header:
+        writer.writerow(serializer.fields)
+
+    count = 0
+    for row in rows:
+        data = serializer(row)
+        if writer:
+            writer.writerow([data[field] for field in serializer.fields])
+        else:
+            buffer.write(json.dumps(data, separators=(",", ":")))
+            buffer.write("\n")
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import func
+from models import db, TaskList, Task
+
+logger = logging.getLogger(__name__)
+
+Template = namedtuple("Template", ["id", "name", "tasks"])
+CatalogSnapshot = namedtuple("CatalogSnapshot", ["templates", "body", "etag", "version"])
+
+
+class TemplateCatalog:
+    """Immutable in-memory snapshot of every tasklist template and its tasks.
+
+    Built once at startup and replaced wholesale, never mutated, so readers
+    need no locking. /tasklists/templates serves the pre-rendered JSON body
+    with a strong ETag, and create_tasklist clones templates from it without
+    reading their tasks. A snapshot is rebuilt when:
+
+    - a view in this process changes a template and calls invalidate();
+    - an admin calls the reload endpoint;
+    - the template version counter (template and task counts, highest ids,
+      latest task update) polled every TEMPLATE_CATALOG_POLL_INTERVAL
+      seconds has moved, which is how other workers notice changes.
+    """
+
+    def __init__(self, app=None):
+        self.poll_interval = 60
+        self._snapshot = None
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.poll_interval = app.config.get("TEMPLATE_CATALOG_POLL_INTERVAL", self.poll_interval)
+        app.extensions["template_catalog"] = self
+
+    def _current_version(self):
+        # Templates are few, so their names are hashed in full; renames do not move any aggregate.
+        names = db.session.query(TaskList.id, TaskList.name).filter(TaskList.is_template.is_(True)).order_by(TaskList.id)
+        templates = hashlib.sha1(repr(names.all()).encode()).hexdigest()
+        tasks = (
+            db.session.query(func.count(Task.id), func.max(Task.id), func.max(Task.updated_at))
+            .join(TaskList, TaskList.id == Task.tasklist_id)
+            .filter(TaskList.is_template.is_(True))
+        )
+        return (templates,) + tuple(tasks.one())
+
+    def reload(self):
+        """Builds a fresh snapshot from the database and swaps it in."""
+        with self._lock:
+            version = self._current_version()
+            tasks = {}
+            task_rows = (
+                db.session.query(Task.tasklist_id, Task.id, Task.title, Task.description)
+                .join(TaskList, TaskList.id == Task.tasklist_id)
+                .filter(TaskList.is_template.is_(True))
+                .order_by(Task.tasklist_id, Task.created_at, Task.id)
+            )
+            for tasklist_id, task_id, title, description in task_rows:
+                tasks.setdefault(tasklist_id, []).append({"id": task_id, "title": title, "description": description})
+
+            templates = {
+                template_id: Template(template_id, name, tuple(tasks.get(template_id, ())))
+                for template_id, name in db.session.query(TaskList.id, TaskList.name)
+                .filter(TaskList.is_template.is_(True))
+                .order_by(TaskList.id)
+            }
+            body = json.dumps([
+                {
+                    "id": template.id,
+                    "name": template.name,
+                    "tasks": [{"id": task["id"], "title": task["title"]} for task in template.tasks]
+                }
+                for template in templates.values()
+            ], sort_keys=True, separators=(",", ":")).encode()
+
+            self._snapshot = CatalogSnapshot(templates, body, hashlib.sha256(body).hexdigest()[:32], version)
+            self._next_poll = time.monotonic() + self.poll_interval
+            logger.info("Loaded %d tasklist templates", len(templates))
+            return self._snapshot
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+        if time.monotonic() >= self._next_poll:
+            self._next_poll = time.monotonic() + self.poll_interval
+            if self._current_version() != snapshot.version:
+                return self.reload()
+        return snapshot
+
+    def get(self, template_id):
+        """Returns the Template with this id, or None."""
+        return self.snapshot().templates.get(template_id)
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+template_catalog = TemplateCatalog()
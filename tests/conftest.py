@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+# The app reads its configuration at import time.
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["HASH_POOL_WORKERS"] = "0"
+os.environ["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app
+from models import db
+
+
+@pytest.fixture
+def app():
+    # Only schema setup runs in a pushed context: the test client must push a
+    # fresh one per request, or flask.g (and the resolved user) leaks between them.
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """Returns a context manager whose value is the list of SQL statements run inside it."""
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counter
+
+
+@pytest.fixture
+def register(client):
+    def register(username):
+        response = client.post(
+            "/register", json={"username": username, "email": f"{username}@example.com", "password": "password"}
+        )
+        assert response.status_code == 201, response.get_json()
+        return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    return register
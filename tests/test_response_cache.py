@@ -0,0 +1,70 @@
+from response_cache import RedisBackend, response_cache
+
+
+def stats(client, headers):
+    response = client.get("/api/task-stats", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def cache_counts():
+    counts = response_cache.stats()["endpoints"].get("task-stats", {"hits": 0, "misses": 0})
+    return counts["hits"], counts["misses"]
+
+
+def test_task_writes_invalidate_cached_stats(client, register):
+    headers = register("alice")
+    tasklist_id = client.post("/tasklists", headers=headers, json={"name": "L"}).get_json()["id"]
+    task = client.post("/tasks", headers=headers, json={"title": "a", "tasklist_id": tasklist_id}).get_json()[0]
+
+    stats(client, headers)
+    hits, misses = cache_counts()
+    before = stats(client, headers)
+    assert cache_counts() == (hits + 1, misses)
+
+    client.patch("/tasks/bulk", headers=headers, json={"updates": [{"id": task["id"], "status": "completed"}]})
+    after = stats(client, headers)
+    assert after["completed"] == before["completed"] + 1
+
+    client.delete(f"/tasks/{task['id']}", headers=headers)
+    assert stats(client, headers)["completed"] == before["completed"]
+
+
+def test_rolled_back_writes_do_not_invalidate(app, client, register):
+    from models import db, Task
+
+    headers = register("alice")
+    stats(client, headers)
+    hits, misses = cache_counts()
+    with app.app_context():
+        db.session.add(Task(title="never", tasklist_id=1))
+        db.session.flush()
+        db.session.rollback()
+    stats(client, headers)
+    assert cache_counts() == (hits + 1, misses)
+
+
+class DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex):
+        self.data[key] = value.encode()
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+
+
+def test_redis_backend_round_trips_json_and_generations():
+    backend = RedisBackend(DictRedis())
+    backend.set("k", {"pending": 1}, 30)
+    backend.bump("workspace:w")
+    backend.bump("workspace:w")
+
+    assert backend.get("k") == {"pending": 1}
+    assert backend.get("missing") is None
+    assert backend.generation("workspace:w") == 2
+    assert backend.generation("personal") == 0
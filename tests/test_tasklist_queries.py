@@ -0,0 +1,52 @@
+import pytest
+
+
+def create_tasklists(client, headers, lists, tasks_per_list):
+    ids = []
+    for n in range(lists):
+        response = client.post("/tasklists", headers=headers, json={"name": f"List {n}"})
+        assert response.status_code == 201, response.get_json()
+        tasklist_id = response.get_json()["id"]
+        for t in range(tasks_per_list):
+            response = client.post("/tasks", headers=headers, json={"title": f"Task {t}", "tasklist_id": tasklist_id})
+            # add_task passes 201 to jsonify() rather than returning it, so the status is 200.
+            assert response.status_code == 200, response.get_json()
+        ids.append(tasklist_id)
+    return ids
+
+
+def get_counting_queries(client, count_queries, headers, url):
+    """Returns (number of queries, JSON body) for a GET, after one warm-up request."""
+    # The warm-up fills the per-process user and blocklist caches.
+    assert client.get(url, headers=headers).status_code == 200
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+
+@pytest.mark.parametrize("query", ["", "&task_fields=id,title,status,priority,due_date"])
+def test_tasklists_query_count_is_constant(client, register, count_queries, query):
+    small, large = register("small"), register("large")
+    create_tasklists(client, small, lists=1, tasks_per_list=1)
+    create_tasklists(client, large, lists=8, tasks_per_list=6)
+
+    url = f"/tasklists?per_page=50{query}"
+    small_queries, small_body = get_counting_queries(client, count_queries, small, url)
+    large_queries, body = get_counting_queries(client, count_queries, large, url)
+
+    assert [len(tasklist["tasks"]) for tasklist in small_body] == [1]
+    assert [len(tasklist["tasks"]) for tasklist in body] == [6] * 8
+    assert large_queries == small_queries
+
+
+def test_tasklist_query_count_is_constant(client, register, count_queries):
+    small, large = register("small"), register("large")
+    [small_id] = create_tasklists(client, small, lists=1, tasks_per_list=1)
+    [large_id] = create_tasklists(client, large, lists=1, tasks_per_list=25)
+
+    small_queries, _ = get_counting_queries(client, count_queries, small, f"/tasklists/{small_id}")
+    large_queries, body = get_counting_queries(client, count_queries, large, f"/tasklists/{large_id}")
+
+    assert len(body["tasks"]) == 25
+    assert large_queries == small_queries
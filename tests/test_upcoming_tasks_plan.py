@@ -0,0 +1,18 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from models import db
+from views.taskstats import upcoming_tasks_query
+
+
+def query_plan(query):
+    statement = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    return [row.detail for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {statement}"))]
+
+
+def test_upcoming_tasks_is_an_ordered_index_only_scan(app):
+    with app.app_context():
+        plan = query_plan(upcoming_tasks_query(SimpleNamespace(id=1), datetime(2026, 1, 1), 30, 5))
+
+    assert plan[0] == "SEARCH tasks USING COVERING INDEX ix_tasks_open_due_date (due_date>? AND due_date<?)"
+    assert not [step for step in plan if step.startswith("SCAN") or "TEMP B-TREE" in step], plan
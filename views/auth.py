@@ -1,6 +1,10 @@
 from flask import make_response, request, Blueprint, jsonify, url_for
 from models import db, User, TokenBlocklist, Workspace
-from werkzeug.security import check_password_hash,generate_password_hash
+from sqlalchemy import select, union_all
+from sqlalchemy.exc import IntegrityError
+from blocklist import revoked_tokens
+from hashing import password_hasher, HashingPoolBusy
+from identity import get_current_user
 from datetime import datetime, timezone, timedelta
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 import uuid
@@ -24,22 +28,14 @@ def add_user():
     if not username or not email or not password:
         return make_response(jsonify({"error": "All fields are required"}), 400)
     
-    if User.query.filter_by(username=username).first():
-        return make_response(jsonify({"error": "Username already exists"}), 409)
-    
-    if User.query.filter_by(email=email).first():
-        return make_response(jsonify({"error": "Email already exists"}), 409)
-
-    hashed_password = generate_password_hash(password)
+    hashed_password = password_hasher.generate(password)
     #send_verification_email(email, verification_token)
     #verification_token = str(uuid.uuid4()) 
 
     try:
+        # Uniqueness is enforced by the database; both rows go out in the commit.
         workspace = Workspace(name=f"{username}'s Workspace")
-        db.session.add(workspace)
-        db.session.flush() 
-
-        new_user = User(username=username, email=email, password=hashed_password, workspace_id=workspace.id)
+        new_user = User(username=username, email=email, password=hashed_password, workspace=workspace)
         db.session.add(new_user)
         db.session.commit()
 
@@ -57,15 +53,25 @@ def add_user():
             }
         }), 201)
     
+    except IntegrityError as e:
+        db.session.rollback()
+        field = "Email" if _violates_email_constraint(e) else "Username"
+        return make_response(jsonify({"error": f"{field} already exists"}), 409)
+
     except Exception as e:
         db.session.rollback()  
         return make_response(jsonify({"error": f"Registration failed: {str(e)}"}), 500)
+
+
+def _violates_email_constraint(error):
+    # Postgres names the constraint (users_email_key), SQLite the column (users.email).
+    message = str(error.orig).lower()
+    return "users_email_key" in message or "users.email" in message or "key (email)" in message
     
 @auth_bp.route("/session", methods=["GET"])
 @jwt_required()
 def check_session():
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
+    user = get_current_user()
     
     if user:
         workspace = db.session.get(Workspace, user.workspace_id)  
@@ -106,12 +112,26 @@ def login():
     if not identifier or not password:
         return make_response(jsonify({"error": "Username/Email and password are required"}), 400)
     
-    user = User.query.filter((User.email == identifier) | (User.username == identifier)).first()
+    # A UNION of two probes lets each side use its own unique index; an OR across
+    # both columns tends to fall back to a sequential scan.
+    candidates = union_all(
+        select(User).where(User.email == identifier),
+        select(User).where(User.username == identifier)
+    ).limit(1)
+    user = db.session.execute(select(User).from_statement(candidates)).scalars().first()
 
     #if user and not user.is_verified:
         #return jsonify({"error": "Please verify your email before logging in."}), 403
 
-    if user and check_password_hash(user.password, password):
+    if user and password_hasher.check(user.password, password):
+        # Upgrade hashes made with older parameters; if the pool is busy, the next login will.
+        if password_hasher.needs_rehash(user.password):
+            try:
+                user.password = password_hasher.generate(password)
+                db.session.commit()
+            except HashingPoolBusy:
+                pass
+
         access_token = create_access_token(identity=str(user.id))
         refresh_token = create_refresh_token(identity=str(user.id))
         
@@ -140,8 +160,7 @@ def refresh():
 @auth_bp.route("/profile", methods=["GET"])    
 @jwt_required()
 def user_profile():
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
+    user = get_current_user()
 
     if user:
         return make_response(jsonify({"username": user.username, "email": user.email}), 200)
@@ -152,14 +171,17 @@ def user_profile():
 @auth_bp.route("/logout", methods=["DELETE"])
 @jwt_required()
 def logout():
-    jti = get_jwt()["jti"]
+    jwt_data = get_jwt()
+    jti = jwt_data["jti"]
     now = datetime.now(timezone.utc)
     
     if TokenBlocklist.query.filter_by(jti=jti).first():
         return make_response(jsonify({"error": "Token already blacklisted"}), 400)
     
-    db.session.add(TokenBlocklist(jti=jti, created_at=now))
+    expires_at = datetime.fromtimestamp(jwt_data["exp"], timezone.utc) if "exp" in jwt_data else None
+    db.session.add(TokenBlocklist(jti=jti, created_at=now, expires_at=expires_at))
     db.session.commit()
+    revoked_tokens.add(jti, jwt_data.get("exp"))
     return make_response(jsonify({"success": "Logged out successfully"}), 200)
 
 @auth_bp.route("/forgot-password", methods=["POST"])
@@ -189,7 +211,7 @@ def reset_password(token):
     if not user or not user.token_expiry or user.token_expiry < datetime.utcnow():
         return jsonify({"error": "Invalid or expired token"}), 400
 
-    user.password = generate_password_hash(new_password)
+    user.password = password_hasher.generate(new_password)
     user.reset_token = None  
     user.token_expiry = None
     db.session.commit()
@@ -1,15 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Notification, User, Task
+from flask_jwt_extended import jwt_required
+from models import db, Notification, User, Task, TaskAssignment
+from sqlalchemy import insert, update
+from identity import get_current_user, user_profiles
 from datetime import datetime, timedelta
 #from app import socketio  
 
 notifications_bp = Blueprint("notifications_bp", __name__)
 
-def get_user():
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
 def send_notification(user_id, message, task_id=None):
     """Creates and emits a real-time notification."""
     notification = Notification(user_id=user_id, message=message, task_id=task_id)
@@ -23,7 +21,7 @@ def send_notification(user_id, message, task_id=None):
 @jwt_required()
 def get_notifications():
     """Fetches notifications for the logged-in user."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -45,7 +43,7 @@ def get_notifications():
 @jwt_required()
 def mark_notification_as_read(notification_id):
     """Marks a notification as read."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -64,7 +62,7 @@ def mark_notification_as_read(notification_id):
 @jwt_required()
 def mark_all_notifications_as_read():
     """Marks all notifications as read for the logged-in user."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -77,7 +75,7 @@ def mark_all_notifications_as_read():
 @jwt_required()
 def delete_notification(notification_id):
     """Deletes a notification."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -95,7 +93,7 @@ def delete_notification(notification_id):
 @jwt_required()
 def toggle_notifications():
     """Allows users to enable or disable notifications."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -103,18 +101,44 @@ def toggle_notifications():
     enable_notifications = data.get("enable_notifications", True)
     user.notifications_enabled = enable_notifications 
     db.session.commit()
+    user_profiles.invalidate(user.id)
     
     return jsonify({"message": "Notification settings updated", "enabled": enable_notifications}), 200
 
 
-def check_task_deadlines():
-    """Checks for upcoming task deadlines and sends notifications."""
-    upcoming_tasks = Task.query.filter(
-        Task.due_date <= datetime.utcnow() + timedelta(hours=1), 
-        Task.status != "completed"
-    ).all()
-    for task in upcoming_tasks:
-        for assignment in task.assignments:
-            send_notification(assignment.user_id, f"Task '{task.title}' is due soon!")
-
+def check_task_deadlines(window=timedelta(hours=1)):
+    """Reminds assignees of open tasks due within `window`, once per deadline; returns the number sent."""
+    now = datetime.utcnow()
+    candidates = (
+        db.session.query(TaskAssignment.id, TaskAssignment.user_id, TaskAssignment.reminded_at, Task.id, Task.title, Task.due_date)
+        .join(Task, Task.id == TaskAssignment.task_id)
+        .join(User, User.id == TaskAssignment.user_id)
+        .filter(
+            Task.status != "completed",
+            Task.due_date > now,
+            Task.due_date <= now + window,
+            User.notifications_enabled.isnot(False)
+        )
+        # Lets several workers run the job at once without reminding twice (PostgreSQL).
+        .with_for_update(of=TaskAssignment, skip_locked=True)
+    )
+    # A reminder counts for the current deadline if it was sent inside that deadline's window.
+    due = [
+        (assignment_id, user_id, task_id, title)
+        for assignment_id, user_id, reminded_at, task_id, title, due_date in candidates
+        if reminded_at is None or reminded_at < due_date - window
+    ]
+    if not due:
+        db.session.rollback()
+        return 0
+
+    db.session.execute(insert(Notification), [
+        {"user_id": user_id, "task_id": task_id, "message": f"Task '{title}' is due soon!", "created_at": now}
+        for _, user_id, task_id, title in due
+    ])
+    db.session.execute(
+        update(TaskAssignment).where(TaskAssignment.id.in_([assignment_id for assignment_id, *_ in due])).values(reminded_at=now),
+        execution_options={"synchronize_session": False}
+    )
     db.session.commit()
+    return len(due)
@@ -1,7 +1,20 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Task , User ,TaskList ,TaskAssignment
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required
+from models import db, Task , User ,TaskList ,TaskAssignment, priority_enum, status_enum
+from identity import get_current_user
+from tasklist_templates import template_catalog
+from serializers import task_serializer, serializer_for, parse_fields
+from sqlalchemy import exists, select, update
+from sqlalchemy.orm import load_only
+from featured_tasks import featured_tasks
+from task_counters import adjust_counters, count_moves, task_key
+from task_io import (
+    EXPORT_MIMETYPES, IMPORT_FORMATS, TITLE_MAX_LENGTH, export_rows, format_for, import_tasks, parse_due_date, read_rows,
+)
+from conditional import task_version, weak_etag, conditional_response
+from pagination import encode_cursor, decode_cursor, keyset_after, keyset_order
 from datetime import datetime
+import csv
 import logging
 
 # Configure logging
@@ -11,19 +24,31 @@ task_bp = Blueprint("task_bp", __name__)
 def is_admin(user):
     return user.role == "admin"
 
-def get_user():
-    user_id = get_jwt_identity()
-    return User.query.get(user_id)
-
 def validate_tasklist(tasklist_id):
     return TaskList.query.get(tasklist_id)
 
+def tasklist_workspace_id(tasklist):
+    """Tasks live in the workspace of their tasklist's owner."""
+    return db.session.query(User.workspace_id).filter_by(id=tasklist.user_id).scalar()
+
+def own_tasks(user):
+    """Filter for the tasks in a user's own lists and those assigned to them."""
+    return Task.tasklist_id.in_(db.select(TaskList.id).where(TaskList.user_id == user.id)) | Task.id.in_(
+        db.select(TaskAssignment.task_id).where(TaskAssignment.user_id == user.id)
+    )
+
+def visible_tasks(user):
+    """Filter for the tasks a user works with: their workspace's, or their own if they have none."""
+    if user.workspace_id:
+        return Task.workspace_id == user.workspace_id
+    return own_tasks(user)
+
 # Create a new task
 @task_bp.route("/tasks", methods=["POST"])
 @jwt_required()
 def add_task():
     """Creates a new task."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -35,12 +60,9 @@ def add_task():
     due_date = None
     if "due_date" in data:
         try:
-            due_date = datetime.strptime(data["due_date"], "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            try:
-                due_date = datetime.strptime(data["due_date"], "%Y-%m-%d")
-            except ValueError:
-                return jsonify({"error": "Invalid date format"}), 400
+            due_date = parse_due_date(data["due_date"])
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid date format"}), 400
             
     new_task = Task(
         title=data.get("title"),
@@ -49,19 +71,25 @@ def add_task():
         priority=data.get("priority", "medium"),
         status=data.get("status", "pending"),
         created_at=datetime.utcnow(),
-        tasklist_id=data["tasklist_id"]
+        tasklist_id=data["tasklist_id"],
+        workspace_id=tasklist_workspace_id(tasklist)
     )
 
     db.session.add(new_task)
+    adjust_counters(count_moves([(None, task_key(new_task))]))
     db.session.commit()
-    return jsonify(new_task.to_dict(), 201)
+    if tasklist.is_template:
+        template_catalog.invalidate()
+    return jsonify(task_serializer(new_task), 201)
 
 
+TASK_SORT_COLUMNS = {"created_at": Task.created_at, "due_date": Task.due_date}
+
 @task_bp.route("/tasks", methods=["GET"])
 @jwt_required()
 def get_tasks():
-    """Fetches tasks with filtering options."""
-    user = get_user()
+    """Fetches one page of tasks with filtering options, oldest first."""
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     
@@ -69,7 +97,24 @@ def get_tasks():
     status = request.args.get("status")
     due_date = request.args.get("due_date")
     
-    query = Task.query
+    sort = request.args.get("sort", "created_at")
+    if sort not in TASK_SORT_COLUMNS:
+        return jsonify({"error": f"sort must be one of: {', '.join(TASK_SORT_COLUMNS)}"}), 400
+    sort_column = TASK_SORT_COLUMNS[sort]
+
+    max_page_size = current_app.config.get("TASKS_MAX_PAGE_SIZE", 100)
+    limit = min(max(request.args.get("limit", max_page_size, type=int), 1), max_page_size)
+
+    try:
+        fields = parse_fields(request.args.get("fields"), Task)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    serializer = serializer_for(Task, fields)
+
+    query = Task.query.filter(visible_tasks(user))
+    if fields:
+        # The sort key and id are still needed to build the next cursor.
+        query = query.options(load_only(*serializer_for(Task, tuple(sorted({*fields, sort, "id"}))).columns()))
     
     if priority:
         query = query.filter_by(priority=priority)
@@ -80,27 +125,86 @@ def get_tasks():
             due_date_obj = datetime.strptime(due_date, "%Y-%m-%d").date()
             query = query.filter(Task.due_date == due_date_obj)
         except ValueError:
-            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}, 400)
-    
-    tasks = query.all()
-    if not tasks:
-        return jsonify({"message": "No tasks found matching the filters"}), 404
-    return jsonify([task.to_dict() for task in tasks]), 200
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            cursor_sort, last_value, last_id = decode_cursor(cursor, (str, datetime, int))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        if cursor_sort != sort:
+            return jsonify({"error": "Cursor does not match sort"}), 400
+        query = query.filter(keyset_after(sort_column, Task.id, last_value, last_id))
+
+    def build():
+        tasks = query.order_by(*keyset_order(sort_column, Task.id)).limit(limit + 1).all()
+        if not tasks and not cursor:
+            return jsonify({"message": "No tasks found matching the filters"}), 404
+
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            last = tasks[-1]
+            next_cursor = encode_cursor([sort, getattr(last, sort), last.id])
+
+        return jsonify({"tasks": serializer.many(tasks), "next_cursor": next_cursor}), 200
+
+    return conditional_response(weak_etag(user.id, *task_version(query)), build)
+
+@task_bp.route("/tasks/export", methods=["GET"])
+@jwt_required()
+def export_tasks():
+    """Streams the tasks the user can see as NDJSON or CSV in id order, resuming after ?cursor=<task id>."""
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_MIMETYPES)}"}), 400
+    try:
+        fields = parse_fields(request.args.get("fields"), Task)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fields and "id" not in fields:
+        # Every row needs its id to serve as a resume point.
+        fields = ("id",) + fields
+    serializer = serializer_for(Task, fields)
+
+    cursor = request.args.get("cursor")
+    if cursor is not None and not cursor.isdigit():
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    batch_size = current_app.config.get("TASKS_EXPORT_BATCH_SIZE", 1000)
+    query = select(*serializer.columns()).where(visible_tasks(user)).order_by(Task.id)
+    if cursor is not None:
+        query = query.where(Task.id > int(cursor))
+    rows = db.session.execute(query.execution_options(yield_per=batch_size))
+
+    response = Response(
+        stream_with_context(export_rows(rows, serializer, fmt, batch_size, header=cursor is None)),
+        mimetype=EXPORT_MIMETYPES[fmt]
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename=tasks.{fmt}"
+    return response
 
 # Update a task
 @task_bp.route("/tasks/<int:task_id>", methods=["PATCH"])
 @jwt_required()
 def update_task(task_id):
     """Updates an existing task with permission checks."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    task = Task.query.filter_by(id=task_id).first_or_404(description="Task not found")
+    # Locked so concurrent updates cannot both move the same task's counter.
+    task = Task.query.with_for_update().filter_by(id=task_id).first_or_404(description="Task not found")
     assignment = TaskAssignment.query.filter_by(task_id=task.id, user_id=user.id).first()
     if user.id != task.tasklist.user_id and not is_admin(user) and not assignment:
         return jsonify({"error": "Unauthorized"}), 403
     
+    counted_as = task_key(task)
     data = request.get_json()
     if "status" in data:
         task.status = data["status"]
@@ -112,9 +216,194 @@ def update_task(task_id):
         task.due_date = data["due_date"]
     if "priority" in data:
         task.priority = data["priority"]
+    if "tasklist_id" in data and data["tasklist_id"] != task.tasklist_id:
+        destination = validate_tasklist(data["tasklist_id"])
+        if not destination:
+            return jsonify({"error": "TaskList not found"}), 404
+        if user.id != destination.user_id and not is_admin(user):
+            return jsonify({"error": "Unauthorized"}), 403
+        if destination.is_template:
+            template_catalog.invalidate()
+        task.tasklist_id = destination.id
+        task.workspace_id = tasklist_workspace_id(destination)
 
+    adjust_counters(count_moves([(counted_as, task_key(task))]))
+    tasklist = task.tasklist
     db.session.commit()
-    return jsonify(task.to_dict()), 200
+    if tasklist.is_template:
+        template_catalog.invalidate()
+    return jsonify(task_serializer(task)), 200
+
+
+BULK_UPDATE_FIELDS = ("status", "title", "description", "due_date", "priority", "tasklist_id")
+
+def bulk_changes(item):
+    """Validates one PATCH /tasks/bulk item; returns (changes, error)."""
+    changes = {field: item[field] for field in BULK_UPDATE_FIELDS if field in item}
+    if not changes:
+        return None, "No fields to update"
+    if "title" in changes and (not isinstance(changes["title"], str) or not changes["title"].strip()):
+        return None, "title must be a non-empty string"
+    if "title" in changes and len(changes["title"]) > TITLE_MAX_LENGTH:
+        return None, f"title must be at most {TITLE_MAX_LENGTH} characters"
+    if changes.get("description") is not None and not isinstance(changes["description"], str):
+        return None, "description must be a string"
+    if "tasklist_id" in changes and (not isinstance(changes["tasklist_id"], int) or isinstance(changes["tasklist_id"], bool)):
+        return None, "tasklist_id must be an integer"
+    if "status" in changes and changes["status"] not in status_enum.enums:
+        return None, f"status must be one of: {', '.join(status_enum.enums)}"
+    if "priority" in changes and changes["priority"] not in priority_enum.enums:
+        return None, f"priority must be one of: {', '.join(priority_enum.enums)}"
+    if changes.get("due_date") is not None:
+        try:
+            changes["due_date"] = parse_due_date(changes["due_date"])
+        except (TypeError, ValueError):
+            return None, "Invalid date format"
+    return changes, None
+
+@task_bp.route("/tasks/bulk", methods=["PATCH"])
+@jwt_required()
+def bulk_update_tasks():
+    """Applies a list of partial task updates in one transaction.
+
+    Permissions for every task are checked with one query, and updates that
+    make the same change are applied together as a single UPDATE. Each item
+    gets its own status in the response.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    items = (request.get_json() or {}).get("updates")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "updates must be a non-empty list"}), 400
+    max_items = current_app.config.get("TASKS_BULK_MAX", 500)
+    if len(items) > max_items:
+        return jsonify({"error": f"At most {max_items} updates per request"}), 400
+
+    results = [None] * len(items)
+    pending = {}
+    for index, item in enumerate(items):
+        task_id = item.get("id") if isinstance(item, dict) else None
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            results[index] = {"id": task_id, "status": 400, "error": "id must be an integer"}
+            continue
+        if task_id in pending:
+            results[index] = {"id": task_id, "status": 400, "error": "Duplicate task id"}
+            continue
+        changes, error = bulk_changes(item)
+        if error:
+            results[index] = {"id": task_id, "status": 400, "error": error}
+            continue
+        pending[task_id] = (index, changes)
+
+    # One query answers "does it exist and may this user change it" for every task.
+    allowed = (TaskList.user_id == user.id) | exists().where(
+        TaskAssignment.task_id == Task.id, TaskAssignment.user_id == user.id
+    )
+    permissions = {
+        task_id: (is_admin(user) or bool(may_edit), is_template, (workspace_id, tasklist_id, status))
+        for task_id, may_edit, is_template, workspace_id, tasklist_id, status in db.session.query(
+            Task.id, allowed, TaskList.is_template, Task.workspace_id, Task.tasklist_id, Task.status
+        )
+        .join(TaskList, TaskList.id == Task.tasklist_id)
+        .filter(Task.id.in_(pending))
+        # The counter deltas below rely on these old values staying current.
+        .with_for_update(of=Task)
+    }
+
+    destination_ids = {changes["tasklist_id"] for _, changes in pending.values() if "tasklist_id" in changes}
+    destinations = {
+        tasklist_id: (owner_id, workspace_id, is_template)
+        for tasklist_id, owner_id, workspace_id, is_template in db.session.query(
+            TaskList.id, TaskList.user_id, User.workspace_id, TaskList.is_template
+        ).join(User, User.id == TaskList.user_id).filter(TaskList.id.in_(destination_ids))
+    } if destination_ids else {}
+
+    groups = {}
+    moves = []
+    touches_template = False
+    for task_id, (index, changes) in pending.items():
+        if task_id not in permissions:
+            results[index] = {"id": task_id, "status": 404, "error": "Task not found"}
+            continue
+        may_edit, is_template, counted_as = permissions[task_id]
+        if not may_edit:
+            results[index] = {"id": task_id, "status": 403, "error": "Unauthorized"}
+            continue
+        if "tasklist_id" in changes:
+            destination = destinations.get(changes["tasklist_id"])
+            if not destination:
+                results[index] = {"id": task_id, "status": 404, "error": "TaskList not found"}
+                continue
+            owner_id, workspace_id, destination_is_template = destination
+            if owner_id != user.id and not is_admin(user):
+                results[index] = {"id": task_id, "status": 403, "error": "Unauthorized"}
+                continue
+            changes = dict(changes, workspace_id=workspace_id)
+            touches_template = touches_template or destination_is_template
+        touches_template = touches_template or is_template
+        groups.setdefault(tuple(sorted(changes.items())), []).append(task_id)
+        workspace_id, tasklist_id, status = counted_as
+        moves.append((counted_as, (
+            changes.get("workspace_id", workspace_id), changes.get("tasklist_id", tasklist_id), changes.get("status", status)
+        )))
+        results[index] = {"id": task_id, "status": 200}
+
+    for shape, task_ids in groups.items():
+        db.session.execute(
+            update(Task).where(Task.id.in_(task_ids)).values(**dict(shape)),
+            execution_options={"synchronize_session": False}
+        )
+    adjust_counters(count_moves(moves))
+    db.session.commit()
+    if touches_template:
+        template_catalog.invalidate()
+
+    return jsonify({"results": results, "updated": sum(len(task_ids) for task_ids in groups.values())}), 200
+
+
+@task_bp.route("/tasks/import", methods=["POST"])
+@jwt_required()
+def import_tasks_endpoint():
+    """Imports tasks into a tasklist from a CSV or NDJSON upload or request body."""
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    tasklist = validate_tasklist(request.args.get("tasklist_id", type=int))
+    if not tasklist:
+        return jsonify({"error": "TaskList not found"}), 404
+    if tasklist.user_id != user.id and not is_admin(user):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    upload = request.files.get("file")
+    stream = upload.stream if upload else request.stream
+    fmt = request.args.get("format") or (
+        format_for(upload.filename, upload.mimetype) if upload else format_for(mimetype=request.mimetype)
+    )
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+    def log_progress(imported, rejected):
+        logging.info("Task import into tasklist %s: %d imported, %d rejected", tasklist.id, imported, rejected)
+
+    workspace_id = tasklist_workspace_id(tasklist)
+    try:
+        summary = import_tasks(
+            read_rows(stream, fmt),
+            tasklist.id,
+            workspace_id,
+            chunk_size=current_app.config.get("TASKS_IMPORT_CHUNK_SIZE", 1000),
+            max_errors=current_app.config.get("TASKS_IMPORT_MAX_ERRORS", 100),
+            progress=log_progress
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"Could not read {fmt} file: {e}"}), 400
+
+    if tasklist.is_template and summary["imported"]:
+        template_catalog.invalidate()
+    return jsonify(summary), 200
 
 
 # Ensure only admins or task creators can delete tasks
@@ -122,26 +411,29 @@ def update_task(task_id):
 @jwt_required()
 def delete_task(task_id):
     """Deletes a task with authorization."""
-    user = get_user()
+    user = get_current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    task = Task.query.filter_by(id=task_id).first_or_404(description="Task not found")
+    task = Task.query.with_for_update().filter_by(id=task_id).first_or_404(description="Task not found")
     if user.id != task.tasklist.user_id and not is_admin(user):
         return jsonify({"error": "Unauthorized"}), 403
     
+    tasklist = task.tasklist
     db.session.delete(task)
+    adjust_counters(count_moves([(task_key(task), None)]))
     db.session.commit()
+    if tasklist.is_template:
+        template_catalog.invalidate()
     return jsonify({"message": "Task deleted successfully"}), 200
 
 # feature task in the landing page
 @task_bp.route("/tasks/featured", methods=["GET"])
 def get_featured_tasks():
-    featured_tasks = []
-
-    for priority in ["low", "medium", "high"]:
-        task = Task.query.filter_by(priority=priority).order_by(Task.created_at.desc()).first()
-        if task:
-            featured_tasks.append(task.to_dict())
-
-    return jsonify(featured_tasks), 200
+    """Serves the newest low, medium and high priority tasks from the in-memory snapshot."""
+    snapshot = featured_tasks.snapshot()
+    response = current_app.response_class(snapshot.body, mimetype="application/json")
+    response.set_etag(snapshot.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = featured_tasks.refresh_interval
+    return response.make_conditional(request)
@@ -1,13 +1,42 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Task, TaskAssignment, User, TaskList, Notification
+from flask_jwt_extended import jwt_required
+from models import db, Task, TaskAssignment, User, TaskList, Notification, upsert_insert
+from identity import current_user_id
+from sqlalchemy import insert
 
 task_assignment_bp = Blueprint("task_assignment_bp", __name__)
 
+def insert_assignments(task_id, user_ids):
+    """Assigns users to a task, skipping existing assignments; returns the ids newly assigned.
+
+    The unique (task_id, user_id) constraint decides what already exists, via
+    INSERT ... ON CONFLICT DO NOTHING RETURNING where the database supports it.
+    """
+    rows = [{"task_id": task_id, "user_id": user_id} for user_id in user_ids]
+    if not rows:
+        return set()
+
+    stmt = upsert_insert(TaskAssignment)
+    if stmt is not None:
+        stmt = (
+            stmt.values(rows)
+            .on_conflict_do_nothing(index_elements=["task_id", "user_id"])
+            .returning(TaskAssignment.user_id)
+        )
+        return {user_id for (user_id,) in db.session.execute(stmt)}
+
+    existing = {
+        user_id for (user_id,) in db.session.query(TaskAssignment.user_id)
+        .filter(TaskAssignment.task_id == task_id, TaskAssignment.user_id.in_(user_ids))
+    }
+    rows = [row for row in rows if row["user_id"] not in existing]
+    if rows:
+        db.session.execute(insert(TaskAssignment), rows)
+    return {row["user_id"] for row in rows}
+
 @task_assignment_bp.route("/tasks/<int:task_id>/assign", methods=["POST"])
 @jwt_required()
 def assign_users_to_task(task_id):
-    current_user_id = get_jwt_identity()
     data = request.get_json()
     user_ids = data.get('user_ids', [])
 
@@ -16,32 +45,32 @@ def assign_users_to_task(task_id):
         return jsonify({"error": "Task not found"}), 404
 
     tasklist = TaskList.query.get(task.tasklist_id)
-    if not tasklist or tasklist.user_id != current_user_id:
+    if not tasklist or tasklist.user_id != current_user_id():
         return jsonify({'error': 'Unauthorized to assign users to this task'}), 403
     
+    # bool is an int subclass, but true is not a user id.
+    if not isinstance(user_ids, list) or not all(
+        isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids
+    ):
+        return jsonify({"error": "user_ids must be a list of integers"}), 400
+
     if not user_ids:  
         return jsonify({"success": "No users assigned (Task remains unassigned)"}), 200
 
-    assigned_users = []
-    for user_id in user_ids:
-        user = User.query.get(user_id)
-        if not user:
-            continue
+    user_ids = set(user_ids)
 
-        assignment = TaskAssignment.query.filter_by(task_id=task.id, user_id=user.id).first()
-        if assignment:
-            continue
+    users = db.session.query(User.id, User.username, User.email).filter(User.id.in_(user_ids)).all()
+    assigned_ids = insert_assignments(task.id, [user.id for user in users])
 
-        new_assignment = TaskAssignment(task_id=task.id, user_id=user.id)
-        db.session.add(new_assignment)
-        assigned_users.append({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email
-        })
-
-        notification = Notification(user_id=user.id, task_id=task.id, message=f"You have been assigned to task: {task.title}")
-        db.session.add(notification)
+    assigned_users = [
+        {"id": user.id, "username": user.username, "email": user.email}
+        for user in users if user.id in assigned_ids
+    ]
+    if assigned_users:
+        message = f"You have been assigned to task: {task.title}"
+        db.session.execute(insert(Notification), [
+            {"user_id": user["id"], "task_id": task.id, "message": message} for user in assigned_users
+        ])
 
     db.session.commit()
     return jsonify({"success": "Users assigned successfully", "assigned_users": assigned_users}), 200
@@ -51,8 +80,6 @@ def assign_users_to_task(task_id):
 @task_assignment_bp.route("/tasks/<int:task_id>/assign/<int:user_id>", methods=["DELETE"])
 @jwt_required()
 def remove_user_from_task(task_id, user_id):
-    current_user_id = get_jwt_identity()
-    
     # Get task
     task = Task.query.get(task_id)
     if not task:
@@ -60,7 +87,7 @@ def remove_user_from_task(task_id, user_id):
 
     # Check if the user is an admin OR the creator of the task's tasklist
     tasklist = TaskList.query.get(task.tasklist_id)
-    if not tasklist or tasklist.user_id != current_user_id:
+    if not tasklist or tasklist.user_id != current_user_id():
         return jsonify({'error': 'Unauthorized to remove users from this task'}), 403
 
     assignment = TaskAssignment.query.filter_by(task_id=task_id, user_id=user_id).first()
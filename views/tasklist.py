@@ -1,60 +1,133 @@
-from flask import Blueprint, request, jsonify
-from models import db, TaskList, Task
+from flask import Blueprint, request, jsonify, current_app
+from views.user import admin_required
+from models import db, TaskList, Task, TaskCounter
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from identity import get_current_user_profile
+from serializers import serializer_for, parse_fields
+from sqlalchemy import func, select, insert
+from tasklist_templates import template_catalog
+from datetime import datetime
+from sqlalchemy.orm import load_only
+from task_counters import adjust_counters
+from conditional import task_version, weak_etag, conditional_response
 
 
 tasklist_bp = Blueprint('tasklist', __name__, url_prefix='/tasklists')
 
+DEFAULT_TASKLIST_FIELDS = ("id", "name", "tasks")
+DEFAULT_TASK_FIELDS = ("id", "title")
+
+def requested_fields():
+    """Reads ?fields= (tasklist columns and "tasks") and ?task_fields= (task columns)."""
+    fields = parse_fields(request.args.get("fields"), TaskList, extra=("tasks",)) or DEFAULT_TASKLIST_FIELDS
+    task_fields = parse_fields(request.args.get("task_fields"), Task) or DEFAULT_TASK_FIELDS
+    return fields, task_fields
+
+def tasks_limit():
+    """Tasks returned per list: ?tasks_limit=, capped at TASKLIST_TASKS_LIMIT."""
+    max_limit = current_app.config.get("TASKLIST_TASKS_LIMIT", 100)
+    return min(max(request.args.get("tasks_limit", max_limit, type=int), 1), max_limit)
+
+def tasklist_query(fields):
+    """TaskList query that loads only the requested tasklist columns."""
+    columns = [getattr(TaskList, name) for name in fields if name != "tasks"] or [TaskList.id]
+    return TaskList.query.options(load_only(*columns))
+
+def load_tasks(tasklists, task_fields, limit):
+    """Fetches the first `limit` tasks of every list in one windowed query.
+
+    Returns {tasklist_id: rows}; a list with more than `limit` tasks gets
+    limit + 1 rows so callers can tell it was cut short.
+    """
+    tasks = {tasklist.id: [] for tasklist in tasklists}
+    if not tasks:
+        return tasks
+
+    columns = [getattr(Task, name) for name in task_fields if name != "tasklist_id"]
+    position = func.row_number().over(partition_by=Task.tasklist_id, order_by=(Task.created_at, Task.id))
+    ranked = (
+        select(Task.tasklist_id, *columns, position.label("position"))
+        .where(Task.tasklist_id.in_(tasks))
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(ranked).where(ranked.c.position <= limit + 1).order_by(ranked.c.tasklist_id, ranked.c.position)
+    )
+    for row in rows:
+        tasks[row.tasklist_id].append(row)
+    return tasks
+
+def serialize_tasklist(tasklist, fields, task_fields, tasks=None, limit=None):
+    list_fields = tuple(name for name in fields if name != "tasks")
+    data = serializer_for(TaskList, list_fields)(tasklist) if list_fields else {}
+    if "tasks" in fields:
+        rows = tasks[tasklist.id]
+        data["tasks"] = serializer_for(Task, task_fields).many(rows[:limit])
+        data["more_tasks"] = len(rows) > limit
+    return data
+
 @tasklist_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_all_tasklist():
     user_id = get_jwt_identity()
     page = request.args.get("page", 1, type=int)  
     per_page = request.args.get("per_page", 5, type=int) 
-    tasklist = TaskList.query.filter_by(user_id=user_id).paginate(page=page, per_page=per_page, error_out=False)
+    try:
+        fields, task_fields = requested_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    tasklist = tasklist_query(fields).filter_by(user_id=user_id).paginate(page=page, per_page=per_page, error_out=False)
 
     if not tasklist.items:
         return jsonify({"error": "Task list not found"}), 404
-    
-    return jsonify([
-        {
-            "id": tasklist.id, 
-            "name": tasklist.name,
-            "tasks": [{"id": task.id, "title": task.title} for task in tasklist.tasks]
-        } 
-        for tasklist in tasklist.items
-    ]), 200
+
+    limit = tasks_limit()
+    tasks = load_tasks(tasklist.items, task_fields, limit) if "tasks" in fields else None
+    return jsonify([serialize_tasklist(tasklist, fields, task_fields, tasks, limit) for tasklist in tasklist.items]), 200
 
 
 @tasklist_bp.route('/<int:tasklist_id>', methods=['GET'])
 @jwt_required()
 def get_tasklist(tasklist_id):
     user_id = get_jwt_identity()
-    tasklist = TaskList.query.filter_by(id=tasklist_id, user_id=user_id).first()
+    try:
+        fields, task_fields = requested_fields()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    tasklist = tasklist_query(fields).filter_by(id=tasklist_id, user_id=user_id).first()
 
     if not tasklist:
         return jsonify({"error": "Task list not found"}), 404
 
-    return jsonify({
-        "id": tasklist.id, 
-        "name": tasklist.name,
-        "tasks": [{"id": task.id, "title": task.title} for task in tasklist.tasks]
-    }), 200
+    limit = tasks_limit()
+    list_data = serialize_tasklist(tasklist, tuple(name for name in fields if name != "tasks"), task_fields)
+    version = task_version(Task.query.filter_by(tasklist_id=tasklist.id)) if "tasks" in fields else ()
+
+    def build():
+        tasks = load_tasks([tasklist], task_fields, limit) if "tasks" in fields else None
+        return jsonify(serialize_tasklist(tasklist, fields, task_fields, tasks, limit)), 200
+
+    return conditional_response(weak_etag(user_id, sorted(list_data.items()), *version), build)
 
 
 @tasklist_bp.route('/templates', methods=['GET'])
 @jwt_required()
 def get_tasklist_templates():
-    templates = TaskList.query.filter_by(is_template=True).all()
+    catalog = template_catalog.snapshot()
+    response = current_app.response_class(catalog.body, mimetype="application/json")
+    response.set_etag(catalog.etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get("TEMPLATE_CATALOG_MAX_AGE", 3600)
+    return response.make_conditional(request)
+
 
-    return jsonify([
-        {
-            "id": template.id,
-            "name": template.name,
-            "tasks": [{"id": task.id, "title": task.title} for task in template.tasks]
-        } 
-        for template in templates
-    ]), 200
+@tasklist_bp.route('/templates/reload', methods=['POST'])
+@admin_required
+def reload_tasklist_templates():
+    catalog = template_catalog.reload()
+    return jsonify({"message": "Templates reloaded", "templates": len(catalog.templates), "etag": catalog.etag}), 200
 
 
 @tasklist_bp.route('/', methods=['POST'])
@@ -67,13 +140,29 @@ def create_tasklist():
         return jsonify({"error": "Task list name is required"}), 400
     
     if 'template_id' in data:
-        template = TaskList.query.filter_by(id=data['template_id'], is_template=True).first()
+        try:
+            template = template_catalog.get(int(data['template_id']))
+        except (TypeError, ValueError):
+            template = None
         if not template:
             return jsonify({"error": "Template not found"}), 404
         
         new_tasklist = TaskList(name=template.name, user_id=user_id)
-        new_tasklist.tasks = [Task(title=task.title, description=task.description) for task in template.tasks]
         db.session.add(new_tasklist)
+        db.session.flush()
+
+        # One executemany for all template tasks instead of an ORM INSERT per task.
+        if template.tasks:
+            workspace_id = get_current_user_profile().workspace_id
+            now = datetime.utcnow()
+            db.session.execute(insert(Task), [
+                {
+                    "title": task["title"], "description": task["description"], "status": "todo",
+                    "tasklist_id": new_tasklist.id, "workspace_id": workspace_id, "created_at": now, "updated_at": now
+                }
+                for task in template.tasks
+            ])
+            adjust_counters({(workspace_id, new_tasklist.id, "todo"): len(template.tasks)})
         db.session.commit()
     else:
         new_tasklist = TaskList(name=data['name'], user_id=user_id)
@@ -106,6 +195,8 @@ def update_tasklist(tasklist_id):
         return jsonify({"error": "Task list name already exists"}), 400
 
     db.session.commit()
+    if tasklist.is_template:
+        template_catalog.invalidate()
     return jsonify({"message": "Task list updated successfully"}), 200
 
 # Delete a task list
@@ -118,6 +209,9 @@ def delete_tasklist(tasklist_id):
     if not tasklist:
         return jsonify({"error": "Task list not found"}), 404
 
+    db.session.query(TaskCounter).filter_by(tasklist_id=tasklist.id).delete(synchronize_session=False)
     db.session.delete(tasklist)
     db.session.commit()
+    if tasklist.is_template:
+        template_catalog.invalidate()
     return jsonify({"message": "Task list deleted successfully"}), 200
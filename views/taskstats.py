@@ -1,36 +1,138 @@
-from flask import Blueprint, jsonify, request
-from models import db, Task
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from flask import Blueprint, jsonify, request, current_app
+from sqlalchemy import func, case, and_, exists
+from conditional import weak_etag, conditional_response
+from response_cache import response_cache
+from models import db, Task, TaskAssignment, TaskCounter, TaskList
+from flask_jwt_extended import jwt_required
+from identity import get_current_user_profile
+from views.task import visible_tasks
+from datetime import datetime, timedelta
 
 task_stats_bp = Blueprint("task_stats_bp", __name__)
 
+STATS_GROUPS = {"priority": Task.priority, "tasklist": Task.tasklist_id}
+STATUS_STATS = {"completed": "completed", "pending": "pending", "in-progress": "inProgress"}
+STAT_NAMES = ("completed", "pending", "inProgress", "overdue")
+
+def count_where(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def stats_columns(now):
+    """Conditional aggregates for every stat, so one scan of the tasks answers them all."""
+    return (
+        count_where(Task.status == "completed").label("completed"),
+        count_where(Task.status == "pending").label("pending"),
+        count_where(Task.status == "in-progress").label("inProgress"),
+        count_where(and_(Task.due_date < now, Task.status != "completed")).label("overdue"),
+    )
+
+def counter_stats(workspace_id, now, by_tasklist):
+    """Workspace stats from task_counters, without scanning the tasks.
+
+    Only overdue is counted from the tasks themselves, because tasks become
+    overdue as time passes. That count reads the (workspace_id, status,
+    due_date) index. Returns {tasklist_id or None: stats}.
+    """
+    groups = {}
+
+    def stats_for(tasklist_id):
+        key = tasklist_id if by_tasklist else None
+        return groups.setdefault(key, dict.fromkeys(STAT_NAMES, 0))
+
+    counters = db.session.query(TaskCounter.tasklist_id, TaskCounter.status, TaskCounter.count).filter(
+        TaskCounter.workspace_id == workspace_id, TaskCounter.count != 0
+    )
+    for tasklist_id, status, count in counters:
+        stats = stats_for(tasklist_id)
+        if status in STATUS_STATS:
+            stats[STATUS_STATS[status]] += count
+
+    overdue = db.session.query(Task.tasklist_id, func.count(Task.id)).filter(
+        Task.workspace_id == workspace_id, Task.status != "completed", Task.due_date < now
+    ).group_by(Task.tasklist_id)
+    for tasklist_id, count in overdue:
+        stats_for(tasklist_id)["overdue"] += count
+    return groups
+
+def compute_stats(user, group_by):
+    """Stats for the caller's tasks, from the counters where they can answer."""
+    now = datetime.utcnow()
+    if user.workspace_id and group_by != "priority":
+        groups = counter_stats(user.workspace_id, now, group_by == "tasklist")
+        if not group_by:
+            return groups.get(None, dict.fromkeys(STAT_NAMES, 0))
+        groups = [dict(stats, tasklist_id=tasklist_id) for tasklist_id, stats in sorted(groups.items())]
+    else:
+        tasks = Task.query.filter(visible_tasks(user))
+        columns = stats_columns(now)
+        if not group_by:
+            return dict(zip(STAT_NAMES, tasks.with_entities(*columns).one()))
+        group_column = STATS_GROUPS[group_by]
+        rows = tasks.with_entities(group_column, *columns).group_by(group_column).order_by(group_column)
+        groups = [dict(zip([group_column.key, *STAT_NAMES], row)) for row in rows]
+
+    totals = {name: sum(group[name] for group in groups) for name in STAT_NAMES}
+    return dict(totals, groups=groups)
+
 @task_stats_bp.route("/api/task-stats", methods=["GET"])
 @jwt_required()
 def get_task_stats():
-    user_id = get_jwt_identity()  
+    """Counts the caller's tasks by status, optionally broken down with ?group_by=priority|tasklist.
+
+    Payloads are cached for RESPONSE_CACHE_TTL seconds, which is also how
+    late a task can show up as overdue.
+    """
+    user = get_current_user_profile()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    group_by = request.args.get("group_by")
+    if group_by and group_by not in STATS_GROUPS:
+        return jsonify({"error": f"group_by must be one of: {', '.join(STATS_GROUPS)}"}), 400
 
-    total_completed = Task.query.filter_by(status="completed").count()
-    total_pending = Task.query.filter_by(status="pending").count()
-    total_in_progress = Task.query.filter_by(status="in-progress").count()
-    total_overdue = Task.query.filter(Task.due_date < datetime.utcnow(), Task.status != "completed").count()
+    payload = response_cache.get_or_set("task-stats", user, lambda: compute_stats(user, group_by))
+    return conditional_response(weak_etag(user.id, repr(payload)), lambda: jsonify(payload))
 
-    return jsonify({
-        "completed": total_completed,
-        "pending": total_pending,
-        "inProgress": total_in_progress,
-        "overdue": total_overdue
-    })
+UPCOMING_MAX_LIMIT = 50
+UPCOMING_MAX_DAYS = 365
+
+def upcoming_tasks_query(user, now, days, limit):
+    """Open tasks of the user due in [now, now + days), soonest first; an index-only range scan of ix_tasks_open_due_date."""
+    # Ownership is checked per row with EXISTS, so it cannot drive the scan; status != "completed"
+    # selects the partial index, whose (due_date, id) order is the ORDER BY.
+    owned = exists().where(TaskList.id == Task.tasklist_id, TaskList.user_id == user.id) | exists().where(
+        TaskAssignment.task_id == Task.id, TaskAssignment.user_id == user.id
+    )
+    return (
+        db.session.query(Task.id, Task.title, Task.due_date)
+        .filter(owned, Task.status != "completed")
+        .filter(Task.due_date >= now, Task.due_date < now + timedelta(days=days))
+        .order_by(Task.due_date.asc(), Task.id.asc())
+        .limit(limit)
+    )
 
 @task_stats_bp.route("/api/upcoming-tasks", methods=["GET"])
 @jwt_required()
 def get_upcoming_tasks():
-    user_id = get_jwt_identity()
+    """Lists the caller's open tasks due within ?days=, soonest first, at most ?limit= of them.
+
+    Covers tasks in the caller's own lists and tasks assigned to them. The
+    defaults are UPCOMING_TASKS_HORIZON_DAYS and UPCOMING_TASKS_LIMIT.
+    """
+    user = get_current_user_profile()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
 
-    upcoming_tasks = Task.query.filter(Task.due_date >= datetime.utcnow()).order_by(Task.due_date.asc()).limit(5).all()
+    days = request.args.get("days", current_app.config.get("UPCOMING_TASKS_HORIZON_DAYS", 30), type=int)
+    limit = request.args.get("limit", current_app.config.get("UPCOMING_TASKS_LIMIT", 5), type=int)
+    days = min(max(days, 1), UPCOMING_MAX_DAYS)
+    limit = min(max(limit, 1), UPCOMING_MAX_LIMIT)
+
+    # Not response-cached: assigned tasks come from other workspaces, whose
+    # writes do not invalidate the caller's tag.
+    upcoming_tasks = upcoming_tasks_query(user, datetime.utcnow(), days, limit).all()
     return jsonify([{
         "id": task.id,
         "title": task.title,
         "dueDate": task.due_date.strftime("%Y-%m-%d %H:%M:%S") if task.due_date else "No Deadline"
     } for task in upcoming_tasks])
-
@@ -1,6 +1,10 @@
 from flask import Blueprint, request, make_response, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Workspace, WorkspaceInvite
+from flask_jwt_extended import jwt_required
+from models import db, User, Workspace, WorkspaceInvite, Task, TaskList, TaskCounter
+from blocklist import revoked_tokens
+from hashing import password_hasher
+from identity import get_current_user, get_current_user_profile, user_profiles
+from response_cache import response_cache
 from flask_mail import Mail, Message
 from functools import wraps
 import secrets
@@ -14,8 +18,7 @@ def admin_required(fn):
     @jwt_required()
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        current_user = db.session.get(User, user_id)
+        current_user = get_current_user_profile()
 
         if not current_user or current_user.role != "admin":
             return make_response({"error": "Admin access required"}), 403
@@ -45,6 +48,16 @@ def get_users():
         "prev_page": users.prev_num if users.has_prev else None
     }), 200
 
+# Runtime metrics for this worker process (Admin only)
+@user_bp.route("/admin/metrics", methods=["GET"])
+@admin_required
+def get_metrics():
+    return jsonify({
+        "password_hashing": password_hasher.metrics(),
+        "token_blocklist": revoked_tokens.stats(),
+        "response_cache": response_cache.stats()
+    }), 200
+
 # Get a specific user by ID
 @user_bp.route("/users/<int:user_id>", methods=["GET"])
 @jwt_required()
@@ -63,8 +76,7 @@ def get_user(user_id):
 @user_bp.route("/users/updateprofile", methods=["PATCH"])
 @jwt_required()
 def update_user():
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)  
+    user = get_current_user()
 
     if not user:
         return make_response({"error": "User not found"}), 404  
@@ -81,20 +93,25 @@ def update_user():
     user.email = email
 
     db.session.commit()
+    user_profiles.invalidate(user.id)
     return make_response({"success": "User updated successfully"}), 200
 
 # Delete user account
 @user_bp.route("/users/deleteaccount", methods=["DELETE"])
 @jwt_required()
 def delete_user():
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)  
+    user = get_current_user()
 
     if not user:
         return make_response({"error": "User not found"}), 404  
 
+    # SQLite does not enforce the ON DELETE CASCADE, so clear the counters explicitly.
+    TaskCounter.query.filter(
+        TaskCounter.tasklist_id.in_(db.select(TaskList.id).where(TaskList.user_id == user.id))
+    ).delete(synchronize_session=False)
     db.session.delete(user)
     db.session.commit()
+    user_profiles.invalidate(user.id)
 
     return make_response({"success": "Account deleted successfully"}), 200
 
@@ -109,8 +126,7 @@ def invite_user():
     if not email or not workspace_id:
         return jsonify({"error": "Email and workspace_id are required"}), 400
 
-    user_id = get_jwt_identity()
-    inviter = db.session.get(User, user_id)
+    inviter = get_current_user()
     
     if not inviter:
         return jsonify({"error": "Invalid user"}), 404
@@ -154,8 +170,7 @@ def accept_invite(token):
     if not invite:
         return jsonify({"error": "Invalid or expired invite"}), 404
 
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
+    user = get_current_user()
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -163,7 +178,16 @@ def accept_invite(token):
     user.workspace_id = invite.workspace_id  
     invite.status = "accepted"
 
+    # The user's tasks follow them into the new workspace.
+    Task.query.filter(
+        Task.tasklist_id.in_(db.select(TaskList.id).where(TaskList.user_id == user.id))
+    ).update({"workspace_id": invite.workspace_id}, synchronize_session=False)
+    TaskCounter.query.filter(
+        TaskCounter.tasklist_id.in_(db.select(TaskList.id).where(TaskList.user_id == user.id))
+    ).update({"workspace_id": invite.workspace_id}, synchronize_session=False)
+
     db.session.commit()
+    user_profiles.invalidate(user.id)
 
     return jsonify({"message": "Joined workspace successfully!"}), 200
 
@@ -200,8 +224,7 @@ def generate_invite_link():
     if not workspace_id:
         return jsonify({"error": "workspace_id is required"}), 400
 
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
+    user = get_current_user_profile()
 
     if not user or user.workspace_id != workspace_id:
         return jsonify({"error": "Unauthorized to generate invite link"}), 403